@@ -1,9 +1,21 @@
 import streamlit as st
 import numpy as np
-from PIL import Image
 import time
+import hashlib
+import os
 import utils
-from utils import load_model, predict_gesture, determine_winner, get_emoji_for_choice, manual_gesture_selection
+from metrics import registry as metrics, start_metrics_server
+from image_io import ImageTooLargeError, load_image
+from image_store import store_session_image
+from prediction_pool import PREDICTION_TIMEOUT, PoolFullError
+from utils import peek_model, start_background_warmup, submit_prediction, TemporalVote, determine_winner, get_emoji_for_choice, manual_gesture_selection
+
+# Every rerun of this script is timed (see script_run_seconds at the bottom)
+script_started = time.perf_counter()
+# Show the metrics snapshot in the sidebar (admin use)
+METRICS_SIDEBAR = os.environ.get('METRICS_SIDEBAR', '0') == '1'
+# Seconds between reruns while a prediction is still running in the worker pool
+PREDICTION_POLL_INTERVAL = float(os.environ.get('PREDICTION_POLL_INTERVAL', 0.2))
 
 # Page configuration
 st.set_page_config(
@@ -61,6 +73,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
+# (player images are compact JPEG thumbnails, see image_store.py)
 if 'game_state' not in st.session_state:
     st.session_state.game_state = 'welcome'
 if 'player1_choice' not in st.session_state:
@@ -79,9 +92,27 @@ if 'player1_score' not in st.session_state:
     st.session_state.player1_score = 0
 if 'player2_score' not in st.session_state:
     st.session_state.player2_score = 0
+# Predictions of every photo taken this turn, by content hash (fed to the temporal vote)
+if 'player1_shots' not in st.session_state:
+    st.session_state.player1_shots = {}
+if 'player2_shots' not in st.session_state:
+    st.session_state.player2_shots = {}
+# Predictions still running in the worker pool, by content hash
+if 'player1_pending' not in st.session_state:
+    st.session_state.player1_pending = {}
+if 'player2_pending' not in st.session_state:
+    st.session_state.player2_pending = {}
+# Whether this turn was already counted in low_confidence_total (reruns must not count it again)
+if 'player1_low_confidence' not in st.session_state:
+    st.session_state.player1_low_confidence = False
+if 'player2_low_confidence' not in st.session_state:
+    st.session_state.player2_low_confidence = False
+# Hand trackers (HAND_ROI=1): each player's photos are searched around their last hand box
+if 'player1_tracker' not in st.session_state:
+    st.session_state.player1_tracker = utils.new_hand_tracker()
+if 'player2_tracker' not in st.session_state:
+    st.session_state.player2_tracker = utils.new_hand_tracker()
 
-# Load model
-load_model()
 
 def reset_game():
     """Reset the game state"""
@@ -92,6 +123,12 @@ def reset_game():
     st.session_state.player2_choice = None
     st.session_state.player2_image = None
     st.session_state.player2_confidence = 0
+    st.session_state.player1_shots = {}
+    st.session_state.player2_shots = {}
+    st.session_state.player1_pending = {}
+    st.session_state.player2_pending = {}
+    st.session_state.player1_low_confidence = False
+    st.session_state.player2_low_confidence = False
 
 def start_new_round():
     """Start a new round keeping scores"""
@@ -102,9 +139,18 @@ def start_new_round():
     st.session_state.player2_choice = None
     st.session_state.player2_image = None
     st.session_state.player2_confidence = 0
+    st.session_state.player1_shots = {}
+    st.session_state.player2_shots = {}
+    st.session_state.player1_pending = {}
+    st.session_state.player2_pending = {}
+    st.session_state.player1_low_confidence = False
+    st.session_state.player2_low_confidence = False
 
 def welcome_screen():
     """Display welcome screen"""
+    # Import TensorFlow and load the shared model while the player reads the rules
+    start_background_warmup()
+
     st.markdown('<div class="game-title">✊✌️✋ Batu Gunting Kertas ✊✌️✋</div>', unsafe_allow_html=True)
 
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -139,9 +185,6 @@ def player_turn(player_num):
     st.markdown(f"### 🎯 Giliran {player_name}")
     st.markdown(f"Silakan pilih Batu ✊, Gunting ✌️, atau Kertas ✋")
 
-    # Check if model is available
-    load_model()  # This will set the warning if model fails to load
-
     # Always use camera/upload - with fallback to simple classifier
     st.info("🤖 **AI Detection**: Menggunakan AI untuk mendeteksi gesture Anda. Model akan bekerja secara otomatis.")
 
@@ -152,7 +195,7 @@ def player_turn(player_num):
         key=f"input_method_{player_num}"
     )
 
-    captured_image = None
+    image_sources = []
 
     if input_method == "📸 Kamera":
         camera_image = st.camera_input(
@@ -160,75 +203,170 @@ def player_turn(player_num):
             key=f"camera_{player_num}"
         )
         if camera_image:
-            captured_image = Image.open(camera_image)
+            image_sources = [camera_image]
     else:
-        uploaded_file = st.file_uploader(
-            f"📁 Upload Foto {player_name}",
+        uploaded_files = st.file_uploader(
+            f"📁 Upload Foto {player_name} (boleh beberapa foto)",
             type=['jpg', 'jpeg', 'png'],
+            accept_multiple_files=True,
             key=f"upload_{player_num}"
         )
-        if uploaded_file:
-            captured_image = Image.open(uploaded_file)
+        if uploaded_files:
+            image_sources = uploaded_files
+
+    # Every photo of this turn votes; retaking a photo adds evidence instead of starting over
+    shots = st.session_state[f"player{player_num}_shots"]
+    pending = st.session_state[f"player{player_num}_pending"]
+    vote = TemporalVote()
+    for shot in shots.values():
+        if shot is not None:
+            vote.add(*shot)
+
+    captured_image = None
+    busy = False
+    for index, image_source in enumerate(image_sources):
+        image_bytes = image_source.getvalue()
+        # Hashed before decoding: poll reruns only decode new photos and the one on screen (the last)
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        known = digest in shots or digest in pending
+        if known and index < len(image_sources) - 1:
+            continue
+        try:
+            # Decoded at most ~2x the model input size, EXIF-rotated, RGB
+            with metrics.timer('image_decode_seconds'):
+                image = load_image(image_bytes)
+        except ImageTooLargeError as e:
+            st.error(f"❌ Foto terlalu besar: {e}")
+            continue
+        except Exception as e:
+            st.error(f"❌ Foto tidak dapat dibaca: {e}")
+            continue
+        captured_image = image
+        if known:
+            continue
+        if vote.decided:
+            if len(image_sources) == 1:
+                # A new photo after a stable decision means the player changed their mind
+                shots.clear()
+                vote = TemporalVote()
+            else:
+                # Early exit: the remaining uploads are not needed for the decision
+                shots[digest] = None
+                continue
+
+        # Inference runs in the worker pool; this run keeps rendering
+        try:
+            pending[digest] = submit_prediction(
+                image, image_bytes=image_bytes, tracker=st.session_state[f"player{player_num}_tracker"]
+            )
+        except PoolFullError:
+            # Not recorded, so the photo is submitted again on the next poll
+            busy = True
+
+    # Collect finished predictions; unfinished ones are checked again on the next rerun
+    for digest, job in list(pending.items()):
+        if job.future.done():
+            del pending[digest]
+            try:
+                prediction, confidence, errors = job.future.result()
+            except Exception as e:
+                st.error(f"❌ Foto gagal dianalisis: {e}")
+                shots[digest] = None
+                continue
+            # Pool threads cannot write to the page; their errors are shown here
+            for message in errors:
+                st.error(message)
+            shots[digest] = (prediction, confidence)
+            vote.add(prediction, confidence)
+        elif job.expired(PREDICTION_TIMEOUT):
+            job.future.cancel()
+            del pending[digest]
+            shots[digest] = None
+            st.warning("⏱️ Analisis foto terlalu lama, silakan ambil foto lagi.")
+
+    if vote.decided:
+        # Early exit: predictions still running cannot change the decision
+        for digest, job in pending.items():
+            job.future.cancel()
+            shots[digest] = None
+        pending.clear()
+        busy = False
 
     if captured_image is not None:
         # Display the captured image
         st.image(captured_image, caption=f"Pilihan {player_name}", width=300)
 
-        # Process the image
-        with st.spinner(f"🤖 AI sedang menganalisis pilihan {player_name}..."):
-            prediction, confidence = predict_gesture(captured_image)
+        if vote.decided:
+            prediction = vote.leader
+            confidence = vote.confidence
 
-            if prediction and confidence > 0.3:  # Lower confidence threshold for simple classifier
-                # Store player choice
+            # Store player choice
+            if player_num == 1:
+                st.session_state.player1_choice = prediction
+                store_session_image(st.session_state, 'player1_image', captured_image)
+                st.session_state.player1_confidence = confidence
+            else:
+                st.session_state.player2_choice = prediction
+                store_session_image(st.session_state, 'player2_image', captured_image)
+                st.session_state.player2_confidence = confidence
+
+            # Display prediction
+            emoji = get_emoji_for_choice(prediction)
+            st.markdown(f"### {emoji} {prediction.capitalize()}")
+            st.markdown(f'<div class="confidence-score">AI Confidence: {confidence:.2%}</div>', unsafe_allow_html=True)
+            if vote.frames_used > 1:
+                st.caption(f"Berdasarkan {vote.frames_used} foto")
+
+            # Continue button
+            if st.button(f"✅ Lanjutkan", key=f"continue_{player_num}", type="primary"):
                 if player_num == 1:
-                    st.session_state.player1_choice = prediction
-                    st.session_state.player1_image = captured_image
-                    st.session_state.player1_confidence = confidence
+                    st.session_state.game_state = 'player2_turn'
                 else:
-                    st.session_state.player2_choice = prediction
-                    st.session_state.player2_image = captured_image
-                    st.session_state.player2_confidence = confidence
-
-                # Display prediction
-                emoji = get_emoji_for_choice(prediction)
-                st.markdown(f"### {emoji} {prediction.capitalize()}")
-                st.markdown(f'<div class="confidence-score">AI Confidence: {confidence:.2%}</div>', unsafe_allow_html=True)
-
-                # Continue button
-                if st.button(f"✅ Lanjutkan", key=f"continue_{player_num}", type="primary"):
-                    if player_num == 1:
-                        st.session_state.game_state = 'player2_turn'
-                    else:
-                        st.session_state.game_state = 'results'
-                    st.rerun()
+                    st.session_state.game_state = 'results'
+                st.rerun()
+        elif pending or busy:
+            if busy:
+                st.info("⏳ Server sedang sibuk, foto akan dianalisis sebentar lagi...")
             else:
-                st.error("❌ Tidak dapat mendeteksi pilihan dengan pasti. Silakan coba lagi.")
-                st.info("💡 Tips: Pastikan gesture Anda jelas (Batu = kepal tangan, Gunting = 2 jari, Kertas = tangan terbuka)")
-
-                # Show manual selection as fallback
-                st.markdown("---")
-                manual_prediction, manual_confidence = manual_gesture_selection(player_name)
-
-                if st.button(f"🔄 Gunakan Pilihan Manual {player_name}", key=f"manual_{player_num}"):
-                    # Store manual choice
-                    if player_num == 1:
-                        st.session_state.player1_choice = manual_prediction
-                        st.session_state.player1_image = captured_image
-                        st.session_state.player1_confidence = manual_confidence
-                    else:
-                        st.session_state.player2_choice = manual_prediction
-                        st.session_state.player2_image = captured_image
-                        st.session_state.player2_confidence = manual_confidence
-
-                    # Move to next state
-                    if player_num == 1:
-                        st.session_state.game_state = 'player2_turn'
-                    else:
-                        st.session_state.game_state = 'results'
-                    st.rerun()
+                st.info(f"🤖 AI sedang menganalisis pilihan {player_name}...")
+        else:
+            # Once per turn, not on every manual-choice click or poll rerun
+            if not st.session_state[f"player{player_num}_low_confidence"]:
+                st.session_state[f"player{player_num}_low_confidence"] = True
+                metrics.inc('low_confidence_total')
+            st.error("❌ Tidak dapat mendeteksi pilihan dengan pasti. Silakan coba lagi.")
+            st.info("💡 Tips: Pastikan gesture Anda jelas (Batu = kepal tangan, Gunting = 2 jari, Kertas = tangan terbuka)")
+            st.info("📸 Ambil foto lagi: setiap foto tambahan ikut dihitung sampai AI yakin.")
+
+            # Show manual selection as fallback
+            st.markdown("---")
+            manual_prediction, manual_confidence = manual_gesture_selection(player_name)
+
+            if st.button(f"🔄 Gunakan Pilihan Manual {player_name}", key=f"manual_{player_num}"):
+                # Store manual choice
+                if player_num == 1:
+                    st.session_state.player1_choice = manual_prediction
+                    store_session_image(st.session_state, 'player1_image', captured_image)
+                    st.session_state.player1_confidence = manual_confidence
+                else:
+                    st.session_state.player2_choice = manual_prediction
+                    store_session_image(st.session_state, 'player2_image', captured_image)
+                    st.session_state.player2_confidence = manual_confidence
+
+                # Move to next state
+                if player_num == 1:
+                    st.session_state.game_state = 'player2_turn'
+                else:
+                    st.session_state.game_state = 'results'
+                st.rerun()
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    if pending or busy:
+        # The page above is already on screen; poll until the worker pool answers
+        time.sleep(PREDICTION_POLL_INTERVAL)
+        st.rerun()
+
 def results_screen():
     """Display results and winner"""
     st.markdown('<div class="game-title">🏆 Hasil Pertandingan 🏆</div>', unsafe_allow_html=True)
@@ -345,23 +483,43 @@ def show_sidebar():
         - Latar belakang sederhana
         """)
 
+        st.markdown("### 🤖 Model")
+        shared_model = peek_model()
+        if shared_model is None:
+            st.caption("Model sedang dimuat di latar belakang...")
+        elif shared_model.model is not None:
+            st.caption(f"Dimuat dalam {shared_model.load_time:.2f}s, warm-up {shared_model.warmup_time:.2f}s")
+        else:
+            st.caption("Mode Demo (model tidak dapat dimuat)")
+
         if st.session_state.player1_score > 0 or st.session_state.player2_score > 0:
             st.markdown("### 🏆 Skor")
             st.metric("Pemain 1", st.session_state.player1_score)
             st.metric("Pemain 2", st.session_state.player2_score)
 
+        if METRICS_SIDEBAR:
+            st.markdown("### 📈 Metrik")
+            st.json(metrics.snapshot(), expanded=False)
+
+# Prometheus endpoint, started once per server process
+start_metrics_server()
+
 # Main game logic
 show_sidebar()
 
 # Display different screens based on game state
-if st.session_state.game_state == 'welcome':
-    welcome_screen()
-elif st.session_state.game_state == 'player1_turn':
-    player_turn(1)
-elif st.session_state.game_state == 'player2_turn':
-    player_turn(2)
-elif st.session_state.game_state == 'results':
-    results_screen()
+try:
+    if st.session_state.game_state == 'welcome':
+        welcome_screen()
+    elif st.session_state.game_state == 'player1_turn':
+        player_turn(1)
+    elif st.session_state.game_state == 'player2_turn':
+        player_turn(2)
+    elif st.session_state.game_state == 'results':
+        results_screen()
+finally:
+    # Also recorded when st.rerun() ends the run early
+    metrics.observe('script_run_seconds', time.perf_counter() - script_started)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+import numpy as np
+
+class BatchScheduler:
+    """
+    Collects single-image inference requests from every session/thread and
+    runs them as one batch once max_batch_size requests are waiting or the
+    oldest request has waited max_wait_ms. Each future also gets a timings
+    dict before its result: wait_seconds in the queue, forward_seconds in predict_fn.
+    """
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='batch-scheduler', daemon=True)
+        self._worker.start()
+
+    def submit(self, batch, *args):
+        """
+        Queue a (1, H, W, C) batch and return a Future of its (1, classes) output.
+        Extra args are passed on to predict_fn; only requests with the same
+        args share a batch.
+        """
+        if self._closed:
+            raise RuntimeError("BatchScheduler is closed")
+        future = Future()
+        self._queue.put((np.asarray(batch), args, future, time.perf_counter()))
+        return future
+
+    def predict(self, batch, *args, timeout=None):
+        """Blocking variant of submit(), same contract as model.predict"""
+        return self.submit(batch, *args).result(timeout=timeout)
+
+    def predict_timed(self, batch, *args, timeout=None):
+        """predict() plus the request's (wait_seconds, forward_seconds)"""
+        future = self.submit(batch, *args)
+        outputs = future.result(timeout=timeout)
+        return outputs, future.timings['wait_seconds'], future.timings['forward_seconds']
+
+    def close(self):
+        """Stop the worker after the queued requests are served"""
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self):
+        """Queue depth and batch-size statistics"""
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                'queue_depth': self._queue.qsize(),
+                'requests': self._requests,
+                'batches': batches,
+                'mean_batch_size': self._requests / batches if batches else 0.0,
+                'batch_sizes': dict(sorted(self._batch_sizes.items()))
+            }
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        pending = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what we have, then let the next _collect() see the shutdown
+                self._queue.put(None)
+                break
+            pending.append(item)
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            if pending is None:
+                return
+
+            # Requests with different shapes (or args) cannot share a forward pass
+            groups = {}
+            for batch, args, future, queued in pending:
+                groups.setdefault((batch.shape[1:], batch.dtype, args), []).append((batch, future, queued))
+
+            for (_, _, args), items in groups.items():
+                self._run_group(items, args)
+
+    def _run_group(self, items, args=()):
+        futures = [future for _, future, _ in items]
+        try:
+            batch = np.concatenate([batch for batch, _, _ in items], axis=0)
+            started = time.perf_counter()
+            outputs = self.predict_fn(batch, *args)
+            forward = time.perf_counter() - started
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._stats_lock:
+            self._batch_sizes[len(items)] += 1
+            self._requests += len(items)
+
+        offset = 0
+        for batch, future, queued in items:
+            count = len(batch)
+            future.timings = {'wait_seconds': started - queued, 'forward_seconds': forward}
+            future.set_result(outputs[offset:offset + count])
+            offset += count
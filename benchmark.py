@@ -0,0 +1,217 @@
+"""
+Inference benchmarks.
+
+    python benchmark.py compiled --runs 200
+    python benchmark.py suite --output bench.json
+
+The suite covers model loading, preprocessing, single-image and batched
+inference, the fallback classifier and end-to-end predict_gesture on the
+bundled sample images plus synthetic frames, and writes p50/p95/p99
+latency, throughput and peak RSS as JSON that can be diffed between commits.
+"""
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+from PIL import Image
+
+import utils
+from fast_inference import CompiledModel, preprocess_batch
+from inference_engine import MODEL_PATH, load_compiled_model, load_keras_model
+from utils import preprocess_image
+
+SAMPLE_IMAGES = ['batu.jpg', 'gunting.jpg', 'gunting-2.jpg', 'kertas.jpg']
+# (width, height) of the synthetic frames
+SYNTHETIC_SIZES = [(224, 224), (640, 480), (1280, 720), (1920, 1080), (4032, 3024)]
+BATCH_SIZES = [1, 8, 32]
+
+def time_calls(fn, runs, warmup=5):
+    """Per-call latencies in milliseconds after a few warm-up calls"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def summarize(name, latencies):
+    print(f"{name:<24} mean {latencies.mean():7.2f} ms   p50 {np.percentile(latencies, 50):7.2f} ms   "
+          f"p95 {np.percentile(latencies, 95):7.2f} ms")
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def measure(fn, runs, items=1, warmup=3):
+    """Latency percentiles, throughput and peak RSS for one benchmark case"""
+    latencies = time_calls(fn, runs, warmup=warmup)
+    return {
+        'runs': runs,
+        'items_per_call': items,
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput_per_s': float(items * 1000 / latencies.mean()),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def load_sample_images():
+    """Bundled sample photos followed by synthetic frames, as (name, RGB array)"""
+    images = []
+    for path in SAMPLE_IMAGES:
+        images.append((path, np.asarray(Image.open(path).convert('RGB'))))
+    rng = np.random.default_rng(0)
+    for width, height in SYNTHETIC_SIZES:
+        images.append((f"synthetic_{width}x{height}", rng.integers(0, 256, (height, width, 3), dtype=np.uint8)))
+    return images
+
+def environment_info():
+    """What the numbers were measured on"""
+    import tensorflow as tf
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor()
+    }
+
+def bench_loaders(results, runs):
+    """Model load time for every loader and engine backend in the repo"""
+    from inference_engine import available_backends, clear_engines, get_engine, load_cached_model
+
+    def cold_engine(backend):
+        clear_engines()
+        return get_engine(backend)
+
+    results['load.utils.load_keras_model'] = measure(lambda: load_keras_model(MODEL_PATH), runs, warmup=0)
+    results['load.utils.load_compiled_model'] = measure(load_compiled_model, runs, warmup=0)
+    # Warm-up call fills the artifact cache, timed calls load the cached graph
+    results['load.inference_engine.load_cached_model'] = measure(load_cached_model, runs, warmup=1)
+    for backend in available_backends():
+        results[f"load.inference_engine.{backend}"] = measure(lambda: cold_engine(backend), runs, warmup=0)
+    # Later lookups return the shared instance
+    results['load.inference_engine.shared'] = measure(get_engine, runs, warmup=1)
+
+def bench_preprocessing(results, images, runs):
+    """Every preprocess_image variant on every image"""
+    from colab_model_loader import TeachableMachineModel
+    tm_model = TeachableMachineModel()
+    for name, image in images:
+        results[f"preprocess.utils.preprocess_image.{name}"] = measure(lambda: preprocess_image(image), runs)
+        results[f"preprocess.fast_inference.preprocess_batch.{name}"] = measure(lambda: preprocess_batch([image]), runs)
+        results[f"preprocess.TeachableMachineModel.preprocess_image.{name}"] = measure(
+            lambda: tm_model.preprocess_image(image), runs)
+
+def bench_inference(results, model, images, runs):
+    """Single-image and batched inference, float input and fused raw input"""
+    batch = preprocess_batch([images[0][1]])
+    results['inference.keras_predict.batch1'] = measure(lambda: model.model.predict(batch, verbose=0), runs)
+    for size in BATCH_SIZES:
+        float_batch = np.repeat(batch, size, axis=0)
+        results[f"inference.compiled.batch{size}"] = measure(lambda: model.predict(float_batch), runs, items=size)
+    for name, image in images:
+        results[f"inference.predict_raw.{name}"] = measure(lambda: model.predict_raw(image), runs)
+    frame = images[0][1]
+    for size in BATCH_SIZES:
+        frames = np.repeat(frame[np.newaxis], size, axis=0)
+        results[f"inference.predict_raw.batch{size}"] = measure(lambda: model.predict_raw(frames), runs, items=size)
+
+def bench_fallback(results, images, runs):
+    """Heuristic fallback classifier"""
+    from simple_classifier import SimpleGestureClassifier
+    classifier = SimpleGestureClassifier()
+    for name, image in images:
+        results[f"fallback.predict_simple.{name}"] = measure(lambda: classifier.predict_simple(image), runs)
+    frame = images[0][1]
+    for size in BATCH_SIZES:
+        frames = [frame] * size
+        results[f"fallback.predict_simple_batch.batch{size}"] = measure(
+            lambda: classifier.predict_simple_batch(frames), runs, items=size)
+
+def bench_end_to_end(results, images, runs):
+    """predict_gesture as the app calls it, with the prediction cache emptied every call"""
+    cache = utils.get_prediction_cache()
+
+    def uncached(image):
+        cache.clear()
+        return utils.predict_gesture(image)
+
+    utils.get_model()
+    for name, image in images:
+        pil_image = Image.fromarray(image)
+        results[f"end_to_end.predict_gesture.{name}"] = measure(lambda: uncached(pil_image), runs)
+
+def bench_suite(runs, load_runs, output):
+    images = load_sample_images()
+    results = {}
+
+    bench_loaders(results, load_runs)
+    bench_preprocessing(results, images, runs)
+    bench_fallback(results, images, runs)
+
+    model = load_compiled_model()
+    if model is not None:
+        bench_inference(results, model, images, runs)
+        bench_end_to_end(results, images, runs)
+    else:
+        print("⚠️ Model could not be loaded, skipping inference benchmarks")
+
+    report = {'environment': environment_info(), 'results': results}
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+    for name, stats in sorted(results.items()):
+        print(f"{name:<72} p50 {stats['p50_ms']:9.2f} ms   p99 {stats['p99_ms']:9.2f} ms   "
+              f"{stats['throughput_per_s']:9.1f}/s")
+    print(f"📄 Results written to {output}")
+    return 0
+
+def bench_compiled(runs, jit_compile=False):
+    """Single-image model.predict vs the compiled inference function"""
+    model = load_keras_model(MODEL_PATH)
+    if model is None:
+        print("❌ Cannot load the model")
+        return 1
+    batch = preprocess_image(Image.open(SAMPLE_IMAGES[0]).convert('RGB'))
+    compiled = CompiledModel(model, jit_compile=jit_compile)
+
+    summarize("keras Model.predict", time_calls(lambda: model.predict(batch, verbose=0), runs))
+    summarize("compiled" + (" (XLA)" if jit_compile else ""), time_calls(lambda: compiled.predict(batch), runs))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture inference benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compiled_parser = subparsers.add_parser('compiled', help="Model.predict vs compiled inference function")
+    compiled_parser.add_argument('--runs', type=int, default=100)
+    compiled_parser.add_argument('--xla', action='store_true', help="Enable XLA JIT for the compiled function")
+    suite_parser = subparsers.add_parser('suite', help="Full benchmark suite written as JSON")
+    suite_parser.add_argument('--runs', type=int, default=50, help="Timed calls per case")
+    suite_parser.add_argument('--load-runs', type=int, default=3, help="Timed calls per model loader")
+    suite_parser.add_argument('--output', default='bench.json', help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compiled':
+        return bench_compiled(args.runs, jit_compile=args.xla)
+    if args.command == 'suite':
+        return bench_suite(args.runs, args.load_runs, args.output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Re-score a directory of game photos with the gesture model.
+
+    python classify_images.py archive/ --format jsonl > scores.jsonl
+    find archive -name '*.jpg' | python classify_images.py - --format csv -o scores.csv
+
+Paths stream through a pipeline of generators: parallel decode in worker
+processes, fixed-size batches, one forward pass per batch, and rows written
+as soon as their batch finishes.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from image_io import decode_for_model
+from utils import INPUT_SIZE, get_model
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def iter_paths(sources):
+    """Image paths from directories (walked recursively), files, or '-' for stdin"""
+    for source in sources:
+        if source == '-':
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield source
+
+def decode_stream(paths, workers, prefetch):
+    """Decode in a process pool, keeping at most prefetch images in flight, in input order"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(decode_for_model, path, INPUT_SIZE)))
+            if len(pending) >= prefetch:
+                path, future = pending.popleft()
+                yield (path,) + future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield (path,) + future.result()
+
+def batched(items, batch_size):
+    """Group a stream into lists of batch_size"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def classify_batches(batches, shared):
+    """One forward pass per batch; yields a result row per image"""
+    from simple_classifier import get_classifier
+    for batch in batches:
+        decoded = [item for item in batch if item[1] is not None]
+        probabilities = {}
+        fallback = {}
+        infer_ms = 0.0
+        if decoded and shared.model is not None:
+            start = time.perf_counter()
+            outputs = shared.model.predict_raw(np.stack([frame for _, frame, _, _ in decoded]))
+            infer_ms = (time.perf_counter() - start) * 1000 / len(decoded)
+            probabilities = {path: output for (path, _, _, _), output in zip(decoded, outputs)}
+        elif decoded:
+            # Demo mode: vectorized heuristic fallback over the batch, no probability vector
+            start = time.perf_counter()
+            results = get_classifier().predict_simple_batch([frame for _, frame, _, _ in decoded])
+            infer_ms = (time.perf_counter() - start) * 1000 / len(decoded)
+            fallback = {path: result for (path, _, _, _), result in zip(decoded, results)}
+
+        for path, frame, decode_ms, error in batch:
+            row = {'path': path, 'label': None, 'confidence': None, 'probabilities': None,
+                   'decode_ms': round(decode_ms, 3), 'infer_ms': None, 'error': error}
+            if frame is not None and shared.model is not None:
+                output = probabilities[path]
+                index = int(np.argmax(output))
+                row.update(label=shared.labels[index], confidence=float(output[index]),
+                           probabilities=[float(p) for p in output], infer_ms=round(infer_ms, 3))
+            elif frame is not None:
+                label, confidence = fallback[path]
+                row.update(label=label, confidence=float(confidence), infer_ms=round(infer_ms, 3))
+            yield row
+
+def write_jsonl(rows, output):
+    for row in rows:
+        output.write(json.dumps(row) + '\n')
+        output.flush()
+
+def write_csv(rows, output, labels):
+    writer = csv.writer(output)
+    writer.writerow(['path', 'label', 'confidence'] + [f"prob_{label}" for label in labels]
+                    + ['decode_ms', 'infer_ms', 'error'])
+    for row in rows:
+        probs = row['probabilities'] or [''] * len(labels)
+        writer.writerow([row['path'], row['label'], row['confidence']] + probs
+                        + [row['decode_ms'], row['infer_ms'], row['error']])
+        output.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify many gesture photos in batches")
+    parser.add_argument('sources', nargs='*', default=['-'],
+                        help="Directories, image files, or '-' to read paths from stdin (default)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Decode processes")
+    parser.add_argument('--prefetch', type=int, default=None,
+                        help="Images decoded ahead of inference (default: 2 batches)")
+    args = parser.parse_args(argv)
+
+    shared = get_model()
+    prefetch = args.prefetch or args.batch_size * 2
+
+    rows = classify_batches(
+        batched(decode_stream(iter_paths(args.sources), args.workers, prefetch), args.batch_size),
+        shared
+    )
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            write_csv(rows, output, shared.labels)
+        else:
+            write_jsonl(rows, output)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,84 +1,43 @@
-import tensorflow as tf
 import numpy as np
-import cv2
-from PIL import Image
-import os
-
-# Custom compatible DepthwiseConv2D layer
-class CompatibleDepthwiseConv2D(tf.keras.layers.DepthwiseConv2D):
-    def __init__(self, *args, **kwargs):
-        # Remove 'groups' parameter if present (not supported in current TF)
-        if 'groups' in kwargs:
-            kwargs.pop('groups')
-        super().__init__(*args, **kwargs)
+from fast_inference import as_rgb_uint8, preprocess_batch
+from inference_engine import get_engine
 
 class TeachableMachineModel:
-    def __init__(self):
+    def __init__(self, backend='keras', num_threads=None, jit_compile=False):
+        # backend: any inference_engine backend ('keras' runs a compiled inference
+        # function, 'tflite' converts to a .tflite flatbuffer for the TFLite interpreter)
+        self.backend = backend
+        self.num_threads = num_threads
+        self.jit_compile = jit_compile
         self.model = None
         self.labels = []
         self.loaded = False
 
     def load_model_from_files(self, model_path='keras_model.h5', labels_path='labels.txt'):
-        """Load the original Teachable Machine model with compatibility fixes"""
+        """Load the original Teachable Machine model through the shared inference engine"""
         try:
             print("🤖 Loading original Teachable Machine model...")
 
-            # Load labels first
-            if os.path.exists(labels_path):
-                with open(labels_path, 'r') as file:
-                    lines = [line.strip() for line in file.readlines()]
-                    self.labels = []
-                    for line in lines:
-                        # Extract gesture name (remove number prefix like "0 batu")
-                        gesture = line.split(' ', 1)[1] if ' ' in line else line
-                        self.labels.append(gesture)
-                print(f"✅ Labels loaded: {self.labels}")
-            else:
-                print(f"⚠️ Labels file not found: {labels_path}")
-                self.labels = ['batu', 'gunting', 'kertas']  # Default fallback
-
-            # Try multiple approaches to load the model
-            model_loaded = False
-
-            # Approach 1: With custom objects
-            try:
-                self.model = tf.keras.models.load_model(
-                    model_path,
-                    compile=False,
-                    custom_objects={
-                        'DepthwiseConv2D': CompatibleDepthwiseConv2D
-                    }
-                )
-                print("✅ Model loaded with custom DepthwiseConv2D")
-                model_loaded = True
-            except Exception as e1:
-                print(f"❌ Approach 1 failed: {str(e1)[:100]}...")
-
-                # Approach 2: Register custom objects globally
-                try:
-                    tf.keras.utils.get_custom_objects()['DepthwiseConv2D'] = CompatibleDepthwiseConv2D
-                    self.model = tf.keras.models.load_model(model_path, compile=False)
-                    print("✅ Model loaded with global custom objects")
-                    model_loaded = True
-                except Exception as e2:
-                    print(f"❌ Approach 2 failed: {str(e2)[:100]}...")
-
-                    # Approach 3: Try loading without compilation
-                    try:
-                        self.model = tf.keras.models.load_model(model_path, compile=False)
-                        print("✅ Model loaded without compilation")
-                        model_loaded = True
-                    except Exception as e3:
-                        print(f"❌ Approach 3 failed: {str(e3)[:100]}...")
-
-            if model_loaded:
-                self.loaded = True
-                print(f"🎉 Model successfully loaded! Input shape: {self.model.input_shape}")
-                return True
-            else:
+            # Only non-default options are passed, so a default loader shares
+            # the instance the app and the fallback classifier already use
+            options = {}
+            if self.num_threads is not None:
+                options['num_threads'] = self.num_threads
+            if self.jit_compile:
+                options['jit_compile'] = True
+            engine = get_engine(self.backend, model_path, labels_path, **options)
+            self.labels = engine.labels
+            print(f"✅ Labels loaded: {self.labels}")
+
+            if engine.model is None:
                 print("❌ All loading approaches failed")
                 return False
 
+            self.model = engine.model
+            self.loaded = True
+            print(f"🎉 Model successfully loaded ({engine.backend})! Input shape: {self.model.input_shape}")
+            return True
+
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             return False
@@ -86,33 +45,8 @@ class TeachableMachineModel:
     def preprocess_image(self, image):
         """Preprocess image for Teachable Machine model (224x224, normalized)"""
         try:
-            # Convert PIL Image to numpy array
-            if isinstance(image, Image.Image):
-                img_array = np.array(image)
-            else:
-                img_array = image
-
-            # Ensure RGB format
-            if len(img_array.shape) == 3 and img_array.shape[2] == 4:
-                img_array = img_array[:, :, :3]  # Remove alpha if present
-
-            # Resize to 224x224 (Teachable Machine standard)
-            img_resized = cv2.resize(img_array, (224, 224))
-
-            # Convert RGB to BGR if needed (Teachable Machine models expect BGR)
-            if len(img_resized.shape) == 3 and img_resized.shape[2] == 3:
-                img_bgr = cv2.cvtColor(img_resized, cv2.COLOR_RGB2BGR)
-            else:
-                img_bgr = img_resized
-
-            # Normalize pixel values to [0, 1]
-            img_normalized = img_bgr / 255.0
-
-            # Add batch dimension
-            img_batch = np.expand_dims(img_normalized, axis=0)
-
-            return img_batch
-
+            # Same resize, BGR order and normalization as the in-graph preprocessing
+            return preprocess_batch([image])
         except Exception as e:
             print(f"❌ Error preprocessing image: {e}")
             return None
@@ -124,13 +58,8 @@ class TeachableMachineModel:
             return None, 0.0
 
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image)
-            if processed_image is None:
-                return None, 0.0
-
-            # Make prediction
-            predictions = self.model.predict(processed_image, verbose=0)
+            # Make prediction (resize and normalization run inside the model)
+            predictions = self.model.predict_raw(as_rgb_uint8(image))
 
             # Get the predicted class and confidence
             predicted_class_index = np.argmax(predictions[0])
@@ -12,11 +12,43 @@ import cv2
 import matplotlib.pyplot as plt
 from google.colab import files
 import io
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
 print("✅ All imports successful!")
 
+# Optional trained fallback model: upload fallback_model.npz (made with
+# light_classifier.py) next to this notebook for real predictions instead of
+# the image-feature heuristic. Same HOG features and softmax as light_classifier.py.
+def load_light_model(path='fallback_model.npz'):
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def light_predict(model, image):
+    size, cell, bins = int(model['feature_size']), int(model['cell_size']), int(model['bins'])
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+    gray = np.asarray(image.convert('L').resize((size, size), Image.BILINEAR), dtype=np.float32) / 255.0
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, 1:-1] = gray[:, 2:] - gray[:, :-2]
+    gy[1:-1, :] = gray[2:, :] - gray[:-2, :]
+    magnitude = np.hypot(gx, gy)
+    orientation_bin = np.minimum(((np.arctan2(gy, gx) % np.pi) * (bins / np.pi)).astype(np.int64), bins - 1)
+    cells = size // cell
+    cell_index = (np.arange(size)[:, None] // cell) * cells + np.arange(size)[None, :] // cell
+    histograms = np.sqrt(np.bincount((cell_index * bins + orientation_bin).ravel(),
+                                     weights=magnitude.ravel(), minlength=cells * cells * bins))
+    features = histograms / (np.linalg.norm(histograms) + 1e-6)
+    logits = ((features - model['mean']) / model['std']) @ model['weights'] + model['bias']
+    probabilities = np.exp(logits - logits.max())
+    probabilities /= probabilities.sum()
+    index = int(np.argmax(probabilities))
+    return str(model['labels'][index]), float(probabilities[index])
+
 class BatuGuntingKertasGame:
     def __init__(self):
         self.labels = ['batu', 'gunting', 'kertas']
@@ -28,6 +60,9 @@ class BatuGuntingKertasGame:
         self.player2_confidence = 0
         self.player1_score = 0
         self.player2_score = 0
+        self.light_model = load_light_model()
+        if self.light_model is not None:
+            print("✅ Fallback model loaded: fallback_model.npz")
 
     def get_emoji(self, choice):
         emoji_map = {
@@ -38,6 +73,12 @@ class BatuGuntingKertasGame:
         return emoji_map.get(choice, '❓')
 
     def predict_gesture(self, image):
+        if self.light_model is not None:
+            try:
+                return light_predict(self.light_model, image)
+            except Exception as e:
+                print(f"Fallback model prediction failed: {e}")
+
         try:
             # Convert to numpy array
             if isinstance(image, Image.Image):
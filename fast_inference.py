@@ -0,0 +1,116 @@
+import numpy as np
+import tensorflow as tf
+import cv2
+# Lives in image_io so callers without TensorFlow can use it; imported here for existing callers
+from image_io import as_rgb_uint8
+
+# Fixed input signature of the Teachable Machine model
+INPUT_SIZE = (224, 224)
+INPUT_SIGNATURE = [tf.TensorSpec(shape=(None, 224, 224, 3), dtype=tf.float32)]
+# Raw frames: uint8 RGB of any height and width
+RAW_INPUT_SIGNATURE = [tf.TensorSpec(shape=(None, None, None, 3), dtype=tf.uint8)]
+
+def preprocess_batch(images, size=INPUT_SIZE):
+    """
+    NumPy version of the in-graph preprocessing for backends without it:
+    resize on uint8, RGB to BGR (Teachable Machine models expect BGR),
+    then one float32 scale to [0, 1].
+    """
+    batch = np.empty((len(images), size[1], size[0], 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        resized = cv2.resize(as_rgb_uint8(image), size)
+        np.multiply(resized[..., ::-1], np.float32(1.0 / 255.0), out=batch[i])
+    return batch
+
+def compile_inference_fn(model, jit_compile=False):
+    """Trace the model once into a tf.function with a fixed input signature"""
+    @tf.function(input_signature=INPUT_SIGNATURE, jit_compile=jit_compile)
+    def infer(batch):
+        return model(batch, training=False)
+    return infer
+
+def compile_raw_inference_fn(model, size=INPUT_SIZE, jit_compile=False):
+    """
+    Trace the model with resize, RGB to BGR and normalization fused in front,
+    so callers pass uint8 RGB frames of any size straight from the decoder
+    """
+    # Every serving path calls this one, so INFERENCE_XLA must apply here too;
+    # XLA compiles once per frame size, and frames arrive resized to one size
+    @tf.function(input_signature=RAW_INPUT_SIGNATURE, jit_compile=jit_compile)
+    def infer_raw(images):
+        resized = tf.image.resize(images, (size[1], size[0]))
+        bgr = tf.reverse(resized, axis=[-1])
+        return model(bgr / 255.0, training=False)
+    return infer_raw
+
+class CompiledModel:
+    """
+    Keras model behind a compiled inference function.
+    predict() mirrors keras Model.predict but skips the data adapter,
+    callbacks and progress bar that dominate single-image calls.
+    """
+    def __init__(self, model, jit_compile=False):
+        self.model = model
+        self.jit_compile = jit_compile
+        self._infer = compile_inference_fn(model, jit_compile=jit_compile)
+        self._infer_raw = compile_raw_inference_fn(model, jit_compile=jit_compile)
+
+    @property
+    def input_shape(self):
+        return self.model.input_shape
+
+    @property
+    def output_shape(self):
+        return self.model.output_shape
+
+    def predict(self, batch, verbose=0):
+        """Return class probabilities for every image in the batch"""
+        return self._infer(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def predict_raw(self, images):
+        """Class probabilities for uint8 RGB frames, (H, W, 3) or (N, H, W, 3)"""
+        images = np.asarray(images, dtype=np.uint8)
+        if images.ndim == 3:
+            images = images[np.newaxis]
+        return self._infer_raw(images).numpy()
+
+def export_inference_graph(model, path, jit_compile=False, size=INPUT_SIZE):
+    """
+    Save the float and raw inference functions as a SavedModel. Loading it
+    needs no Keras layer classes, so none of the HDF5 compatibility fixes.
+    """
+    module = tf.Module()
+    module.model = model
+    module.infer = compile_inference_fn(model, jit_compile=jit_compile)
+    module.infer_raw = compile_raw_inference_fn(model, size, jit_compile=jit_compile)
+    module.num_classes = tf.Variable(int(model.output_shape[-1]), trainable=False)
+    tf.saved_model.save(module, path)
+    return path
+
+class SavedInferenceModel:
+    """Inference functions restored from export_inference_graph, same interface as CompiledModel"""
+    def __init__(self, path):
+        self.path = path
+        self.module = tf.saved_model.load(path)
+        self._infer = self.module.infer
+        self._infer_raw = self.module.infer_raw
+        self._num_classes = int(self.module.num_classes.numpy())
+
+    @property
+    def input_shape(self):
+        return (None, INPUT_SIZE[1], INPUT_SIZE[0], 3)
+
+    @property
+    def output_shape(self):
+        return (None, self._num_classes)
+
+    def predict(self, batch, verbose=0):
+        """Return class probabilities for every image in the batch"""
+        return self._infer(np.asarray(batch, dtype=np.float32)).numpy()
+
+    def predict_raw(self, images):
+        """Class probabilities for uint8 RGB frames, (H, W, 3) or (N, H, W, 3)"""
+        images = np.asarray(images, dtype=np.uint8)
+        if images.ndim == 3:
+            images = images[np.newaxis]
+        return self._infer_raw(images).numpy()
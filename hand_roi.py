@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# Skin colour range in YCrCb (Y, Cr, Cb), a common choice that is fairly stable across skin tones
+SKIN_YCRCB_LOW = (0, 133, 77)
+SKIN_YCRCB_HIGH = (255, 173, 127)
+# Fraction of the box added on every side before cropping
+ROI_PADDING = float(os.environ.get('ROI_PADDING', 0.25))
+# Smallest skin blob, as a fraction of the searched area, accepted as a hand
+MIN_HAND_AREA = 0.01
+# Long side of the frame copy used for detection
+DETECT_SIZE = 160
+
+class HandTracker:
+    """
+    Finds the hand with skin-colour segmentation plus contours and returns a
+    padded crop for the model. Once a hand is found, the next frame is only
+    searched around the previous box; a full-frame search happens on the
+    first frame or when the hand is lost.
+    """
+    def __init__(self, padding=ROI_PADDING, detect_size=DETECT_SIZE, min_area=MIN_HAND_AREA):
+        self.padding = padding
+        self.detect_size = detect_size
+        self.min_area = min_area
+        # Last box in normalized (x0, y0, x1, y1) frame coordinates
+        self.box = None
+        self._timings = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.full_searches = 0
+        self.tracked_searches = 0
+
+    def _skin_mask(self, image):
+        import cv2
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_RGB2YCrCb)
+        mask = cv2.inRange(ycrcb, SKIN_YCRCB_LOW, SKIN_YCRCB_HIGH)
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+
+    def _largest_blob(self, image):
+        """Bounding box (x, y, w, h) of the largest skin contour in image, or None"""
+        import cv2
+        mask = self._skin_mask(image)
+        contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+        if not contours:
+            return None
+        largest = max(contours, key=cv2.contourArea)
+        if cv2.contourArea(largest) < self.min_area * mask.shape[0] * mask.shape[1]:
+            return None
+        return cv2.boundingRect(largest)
+
+    def _search(self, frame, region):
+        """Search a normalized region of the frame on a small copy; returns a normalized box"""
+        import cv2
+        height, width = frame.shape[:2]
+        x0, y0 = int(region[0] * width), int(region[1] * height)
+        x1, y1 = int(region[2] * width), int(region[3] * height)
+        area = frame[y0:y1, x0:x1]
+        if area.size == 0:
+            return None
+        scale = self.detect_size / max(area.shape[:2])
+        small = cv2.resize(area, (max(1, int(area.shape[1] * scale)), max(1, int(area.shape[0] * scale))),
+                           interpolation=cv2.INTER_AREA) if scale < 1 else area
+        blob = self._largest_blob(small)
+        if blob is None:
+            return None
+        bx, by, bw, bh = blob
+        sx = (x1 - x0) / small.shape[1]
+        sy = (y1 - y0) / small.shape[0]
+        return (
+            (x0 + bx * sx) / width, (y0 + by * sy) / height,
+            (x0 + (bx + bw) * sx) / width, (y0 + (by + bh) * sy) / height
+        )
+
+    def _pad(self, box, amount):
+        x0, y0, x1, y1 = box
+        pad_x = (x1 - x0) * amount
+        pad_y = (y1 - y0) * amount
+        return (max(0.0, x0 - pad_x), max(0.0, y0 - pad_y), min(1.0, x1 + pad_x), min(1.0, y1 + pad_y))
+
+    def locate(self, frame):
+        """Normalized hand box for this frame, or None when no hand is visible"""
+        box = None
+        if self.box is not None:
+            # Tracking: the hand moves little between frames, search around the last box
+            self.tracked_searches += 1
+            box = self._search(frame, self._pad(self.box, 1.0))
+        if box is None:
+            self.full_searches += 1
+            box = self._search(frame, (0.0, 0.0, 1.0, 1.0))
+        self.box = box
+        return box
+
+    def crop(self, frame):
+        """Padded crop around the hand, or the whole frame if none is found"""
+        start = time.perf_counter()
+        box = self.locate(frame)
+        if box is not None:
+            height, width = frame.shape[:2]
+            x0, y0, x1, y1 = self._pad(box, self.padding)
+            crop = frame[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+            if crop.size:
+                frame = crop
+        with self._lock:
+            self.frames += 1
+            self._timings.append((time.perf_counter() - start) * 1000)
+        return frame
+
+    def reset(self):
+        """Forget the tracked box (next frame gets a full search)"""
+        self.box = None
+
+    def stats(self):
+        with self._lock:
+            timings = np.array(self._timings)
+            return {
+                'frames': self.frames,
+                'full_searches': self.full_searches,
+                'tracked_searches': self.tracked_searches,
+                'roi_p50_ms': float(np.percentile(timings, 50)) if len(timings) else None,
+                'roi_p95_ms': float(np.percentile(timings, 95)) if len(timings) else None,
+            }
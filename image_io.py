@@ -0,0 +1,104 @@
+import io
+import os
+import time
+import numpy as np
+from PIL import Image, ImageOps
+
+# Upload limits, checked before any pixel is decoded
+MAX_IMAGE_BYTES = int(os.environ.get('MAX_IMAGE_BYTES', 15 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 50_000_000))
+# PNG, WebP and other formats without draft decoding are decoded at full size
+# first (3 bytes per pixel), so they get a lower limit than JPEG
+MAX_FULL_DECODE_PIXELS = int(os.environ.get('MAX_FULL_DECODE_PIXELS', 12_000_000))
+# Images are never kept larger than ~2x the 224x224 model input
+DECODE_MAX_SIDE = int(os.environ.get('DECODE_MAX_SIDE', 448))
+
+class ImageTooLargeError(ValueError):
+    """The upload exceeds the configured byte or pixel limit"""
+
+def read_image_bytes(source):
+    """Raw bytes from bytes, a path, or a file-like object such as a Streamlit upload"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            return file.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    return source.read()
+
+def load_image(source, max_bytes=MAX_IMAGE_BYTES, max_pixels=MAX_IMAGE_PIXELS, max_side=DECODE_MAX_SIDE,
+               max_full_decode_pixels=MAX_FULL_DECODE_PIXELS):
+    """
+    Decode an image with bounded memory and return an RGB PIL image whose
+    longest side is at most max_side.
+
+    JPEGs are decoded at a reduced scale (draft mode), EXIF orientation is
+    applied, and palette/RGBA/grayscale images are converted to RGB.
+    Raises ImageTooLargeError before decoding if a limit is exceeded; other
+    formats decode every pixel, so they are held to max_full_decode_pixels.
+    """
+    data = read_image_bytes(source)
+    if len(data) > max_bytes:
+        raise ImageTooLargeError(f"Image is {len(data) / 1024 / 1024:.1f} MB, limit is {max_bytes / 1024 / 1024:.1f} MB")
+
+    # Image.open only parses the header, so the size check costs no pixels
+    image = Image.open(io.BytesIO(data))
+    width, height = image.size
+    if width * height > max_pixels:
+        raise ImageTooLargeError(f"Image is {width}x{height} pixels, limit is {max_pixels} pixels")
+    if image.format != 'JPEG' and width * height > max_full_decode_pixels:
+        raise ImageTooLargeError(f"{image.format} image is {width}x{height} pixels, "
+                                 f"limit is {max_full_decode_pixels} pixels (only JPEG can be decoded downscaled)")
+
+    # JPEG: let the decoder downscale by 1/2, 1/4 or 1/8 while decoding
+    if image.format == 'JPEG':
+        image.draft('RGB', (max_side, max_side))
+
+    # Downscale before rotating so the transpose works on the small image
+    image.thumbnail((max_side, max_side), Image.BILINEAR)
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+def as_rgb_uint8(image):
+    """PIL image or array to a uint8 HxWx3 RGB array, without float copies"""
+    if isinstance(image, Image.Image):
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return np.asarray(image)
+
+    array = np.asarray(image)
+    if array.dtype != np.uint8:
+        array = np.clip(array, 0, 255).astype(np.uint8)
+    if array.ndim == 2:
+        array = np.repeat(array[..., np.newaxis], 3, axis=-1)
+    elif array.shape[-1] == 4:
+        array = array[..., :3]
+    return array
+
+def resize_for_model(frame, size=(224, 224)):
+    """
+    uint8 RGB frame at the model input size (bilinear, like the in-graph resize),
+    so frames from uploads of any size share one shape and batch together
+    """
+    if frame.shape[:2] == (size[1], size[0]):
+        return frame
+    import cv2
+    return cv2.resize(np.ascontiguousarray(frame), size, interpolation=cv2.INTER_LINEAR)
+
+def decode_for_model(path, size=(224, 224)):
+    """
+    Decode one file to a uint8 RGB array at the model input size, the same
+    decode and resize the app applies before predict_raw, so re-scored photos
+    get the live prediction.
+    Runs in worker processes, so it returns (array, decode_ms, error) instead of raising.
+    """
+    start = time.perf_counter()
+    try:
+        frame = resize_for_model(np.asarray(load_image(path)), size)
+        return frame, (time.perf_counter() - start) * 1000, None
+    except Exception as e:
+        return None, (time.perf_counter() - start) * 1000, str(e)
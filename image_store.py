@@ -0,0 +1,45 @@
+import io
+import os
+from PIL import Image
+
+# results_screen shows photos 250 px wide; keep a little headroom for sharp displays
+THUMBNAIL_MAX_SIDE = int(os.environ.get('THUMBNAIL_MAX_SIDE', 320))
+# JPEG qualities tried in order until the thumbnail fits the session budget
+THUMBNAIL_QUALITIES = (80, 60, 40)
+# Bytes of stored photos allowed per session (both players together)
+SESSION_IMAGE_BUDGET = int(os.environ.get('SESSION_IMAGE_BUDGET', 128 * 1024))
+# Session state keys holding player photos
+IMAGE_KEYS = ('player1_image', 'player2_image')
+
+def encode_thumbnail(image, max_side=THUMBNAIL_MAX_SIDE, quality=THUMBNAIL_QUALITIES[0]):
+    """Downscaled JPEG bytes of a PIL image"""
+    thumbnail = image.copy()
+    thumbnail.thumbnail((max_side, max_side), Image.BILINEAR)
+    if thumbnail.mode != 'RGB':
+        thumbnail = thumbnail.convert('RGB')
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def session_image_bytes(session_state, exclude=None):
+    """Bytes currently used by stored photos in one session"""
+    total = 0
+    for key in IMAGE_KEYS:
+        if key != exclude and isinstance(session_state.get(key), bytes):
+            total += len(session_state[key])
+    return total
+
+def store_session_image(session_state, key, image, budget=SESSION_IMAGE_BUDGET):
+    """
+    Keep only a compact JPEG thumbnail of image in session_state[key].
+    Quality drops until it fits the session budget; if nothing fits, the
+    photo is not kept (results show a placeholder) and False is returned.
+    """
+    available = budget - session_image_bytes(session_state, exclude=key)
+    for quality in THUMBNAIL_QUALITIES:
+        data = encode_thumbnail(image, quality=quality)
+        if len(data) <= available:
+            session_state[key] = data
+            return True
+    session_state[key] = None
+    return False
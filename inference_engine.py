@@ -0,0 +1,370 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+import weakref
+import numpy as np
+
+# One loaded model per backend per process, shared by the Streamlit app, the
+# fallback classifier, the Colab loader and the command-line tools.
+# TensorFlow, OpenCV and the backend modules are imported on first use.
+
+# Model files and input size expected by the Teachable Machine model
+MODEL_PATH = 'keras_model.h5'
+LABELS_PATH = 'labels.txt'
+INPUT_SIZE = (224, 224)
+DEFAULT_LABELS = ['batu', 'gunting', 'kertas']
+
+# Inference backend: 'keras' (default), 'tflite' (converted model, CPU interpreter),
+# 'tflite-int8' (full-integer model produced by quantize_model.py) or
+# 'heuristic' (image-feature fallback, no TensorFlow model)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', 'model.tflite')
+INT8_MODEL_PATH = os.environ.get('INT8_MODEL_PATH', 'model_int8.tflite')
+TFLITE_THREADS = int(os.environ['TFLITE_THREADS']) if os.environ.get('TFLITE_THREADS') else None
+
+# Compile the Keras model with XLA JIT (INFERENCE_XLA=1); may not help on every CPU
+INFERENCE_XLA = os.environ.get('INFERENCE_XLA', '0') == '1'
+
+# Converted inference graphs, keyed by the SHA-256 of the .h5 and the TF version,
+# so later starts skip the HDF5 compatibility attempts; empty disables the cache
+MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR', '.model_cache')
+# Artifacts kept in the cache; older ones (previous retrains) are pruned on load
+MODEL_CACHE_KEEP = int(os.environ.get('MODEL_CACHE_KEEP', 3))
+
+_compatible_depthwise_conv2d = None
+
+def get_compatible_depthwise_conv2d():
+    """Custom DepthwiseConv2D layer to handle compatibility issues (built on first use)"""
+    global _compatible_depthwise_conv2d
+    if _compatible_depthwise_conv2d is None:
+        import tensorflow as tf
+
+        class CompatibleDepthwiseConv2D(tf.keras.layers.DepthwiseConv2D):
+            def __init__(self, *args, **kwargs):
+                # Remove 'groups' from kwargs if present (not supported in current TF version)
+                if 'groups' in kwargs:
+                    kwargs.pop('groups')
+                super().__init__(*args, **kwargs)
+
+        _compatible_depthwise_conv2d = CompatibleDepthwiseConv2D
+    return _compatible_depthwise_conv2d
+
+class GestureModel:
+    """Model and labels shared by every session of the server process"""
+    def __init__(self, model, labels, load_time=0.0, warmup_time=0.0, version='fallback', backend=None):
+        self.model = model
+        self.labels = labels
+        self.version = version
+        self.backend = backend
+        self.load_time = load_time
+        self.warmup_time = warmup_time
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_labels(labels_path=LABELS_PATH):
+    """Read gesture names from labels.txt"""
+    try:
+        with open(labels_path, 'r') as file:
+            lines = [line.strip() for line in file.readlines()]
+            labels = []
+            for line in lines:
+                # Extract gesture name (remove number prefix)
+                gesture = line.split(' ', 1)[1] if ' ' in line else line
+                labels.append(gesture)
+        print(f"Labels loaded successfully: {labels}")
+    except Exception as e:
+        print(f"Error loading labels: {e}")
+        labels = list(DEFAULT_LABELS)
+        print("Using default labels")
+    return labels
+
+def load_keras_model(model_path=MODEL_PATH):
+    """Load the Keras model with compatibility fixes, None if every attempt fails"""
+    import tensorflow as tf
+    CompatibleDepthwiseConv2D = get_compatible_depthwise_conv2d()
+    try:
+        # First attempt: with compatible custom objects
+        model = tf.keras.models.load_model(
+            model_path,
+            compile=False,
+            custom_objects={
+                'DepthwiseConv2D': CompatibleDepthwiseConv2D
+            }
+        )
+        print("Model loaded successfully with compatible custom objects")
+        return model
+    except Exception as first_error:
+        print(f"First attempt failed: {first_error}")
+    try:
+        # Second attempt: with legacy DepthwiseConv2D
+        tf.keras.utils.get_custom_objects()['DepthwiseConv2D'] = CompatibleDepthwiseConv2D
+        model = tf.keras.models.load_model(model_path, compile=False)
+        print("Model loaded successfully with legacy custom objects")
+        return model
+    except Exception as second_error:
+        print(f"Second attempt failed: {second_error}")
+    try:
+        # Third attempt: try different loading method
+        model = tf.keras.models.load_model(model_path)
+        print("Model loaded successfully with default loading")
+        return model
+    except Exception as third_error:
+        print(f"Third attempt failed: {third_error}")
+    # If all attempts fail, return None for demo mode
+    print("Model loading failed, using demo mode")
+    return None
+
+def load_compiled_model(model_path=MODEL_PATH, jit_compile=INFERENCE_XLA):
+    """Keras model wrapped in the compiled inference functions, None if loading fails"""
+    from fast_inference import CompiledModel
+    model = load_keras_model(model_path)
+    if model is None:
+        return None
+    return CompiledModel(model, jit_compile=jit_compile)
+
+def artifact_path(model_path=MODEL_PATH, cache_dir=MODEL_CACHE_DIR, jit_compile=False):
+    """Cache location of the converted inference graph for this model file and TF version"""
+    import tensorflow as tf
+    name = f"{file_digest(model_path)[:16]}-tf{tf.__version__}" + ("-xla" if jit_compile else "")
+    return os.path.join(cache_dir, name)
+
+def prune_model_cache(cache_dir=MODEL_CACHE_DIR, current=None, keep=MODEL_CACHE_KEEP):
+    """
+    Mark current as just used and remove all but the keep most recently used
+    artifacts, plus exports abandoned for over an hour; returns removed paths
+    """
+    if current is not None:
+        os.utime(current)
+    now = time.time()
+    artifacts, removed = [], []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if '.tmp-' in name:
+            # Another replica may still be exporting into a recent one
+            if now - os.path.getmtime(path) > 3600:
+                removed.append(path)
+        elif path != current:
+            artifacts.append(path)
+    artifacts.sort(key=os.path.getmtime, reverse=True)
+    removed += artifacts[max(keep - (current is not None), 0):]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+        print(f"Pruned stale model artifact {path}")
+    return removed
+
+def load_cached_model(model_path=MODEL_PATH, cache_dir=MODEL_CACHE_DIR, jit_compile=INFERENCE_XLA):
+    """
+    Inference graph from the artifact cache in one attempt. On a miss the Keras
+    model is loaded the slow way, exported to the cache and served from there.
+    """
+    from fast_inference import SavedInferenceModel, export_inference_graph
+    if not cache_dir:
+        return load_compiled_model(model_path, jit_compile=jit_compile)
+
+    path = artifact_path(model_path, cache_dir, jit_compile)
+    if os.path.isdir(path):
+        try:
+            model = SavedInferenceModel(path)
+            print(f"Model loaded from cached artifact {path}")
+            _prune_quietly(cache_dir, path)
+            return model
+        except Exception as e:
+            print(f"Cached artifact {path} unusable, reloading the Keras model: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+
+    model = load_compiled_model(model_path, jit_compile=jit_compile)
+    if model is None:
+        return None
+    try:
+        # Export next to the final path, then rename, so other replicas never see half an artifact
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        export_inference_graph(model.model, tmp_path, jit_compile=jit_compile)
+        if os.path.isdir(path):
+            # Another replica finished first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+        print(f"Model artifact cached at {path}")
+        _prune_quietly(cache_dir, path)
+        # Serve the same graph later starts will load
+        return SavedInferenceModel(path)
+    except Exception as e:
+        print(f"Could not cache model artifact: {e}")
+        return model
+
+def _prune_quietly(cache_dir, current):
+    try:
+        prune_model_cache(cache_dir, current)
+    except Exception as e:
+        print(f"Could not prune the model cache: {e}")
+
+def warm_up_model(model):
+    """Run one inference on a dummy frame so the first player skips graph building"""
+    dummy_frame = np.zeros((1, INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.uint8)
+    start = time.perf_counter()
+    model.predict_raw(dummy_frame)
+    return time.perf_counter() - start
+
+# name -> (loader, fallback backend name or None)
+_backends = {}
+
+def register_backend(name, fallback=None):
+    """
+    Register loader(model_path, **options) under name. The loader returns an
+    object with predict/predict_raw/input_shape/output_shape, or None; when it
+    fails, get_engine() serves the shared instance of the fallback backend.
+    """
+    def decorator(loader):
+        _backends[name] = (loader, fallback)
+        return loader
+    return decorator
+
+def available_backends():
+    return sorted(_backends)
+
+@register_backend('keras')
+def _load_keras(model_path, jit_compile=INFERENCE_XLA, cache_dir=MODEL_CACHE_DIR, **options):
+    return load_cached_model(model_path, cache_dir=cache_dir, jit_compile=jit_compile)
+
+def derived_model_path(model_path, default, suffix):
+    """
+    default for the production model; any other .h5 (e.g. a shadow candidate)
+    gets its own file named after it, so it never reuses or overwrites production's
+    """
+    if model_path == MODEL_PATH:
+        return default
+    return os.path.splitext(model_path)[0] + suffix
+
+@register_backend('tflite', fallback='keras')
+def _load_tflite(model_path, num_threads=TFLITE_THREADS, output_path=None, **options):
+    import tflite_backend
+    output_path = output_path or derived_model_path(model_path, TFLITE_MODEL_PATH, '.tflite')
+    return tflite_backend.load_or_convert(model_path, load_keras_model, output_path, num_threads=num_threads)
+
+@register_backend('tflite-int8', fallback='keras')
+def _load_tflite_int8(model_path, num_threads=TFLITE_THREADS, int8_path=None, **options):
+    import tflite_backend
+    # retrained.h5 -> retrained_int8.tflite, written by quantize_model.py --model/--output
+    int8_path = int8_path or derived_model_path(model_path, INT8_MODEL_PATH, '_int8.tflite')
+    return tflite_backend.TFLiteGestureModel(int8_path, num_threads=num_threads)
+
+@register_backend('heuristic')
+def _load_heuristic(model_path, **options):
+    from simple_classifier import HeuristicModel
+    return HeuristicModel()
+
+def model_source_path(backend, model_path=MODEL_PATH):
+    """File a backend loads its weights from, hashed into the engine version and watched for hot reload"""
+    if backend == 'tflite':
+        return derived_model_path(model_path, TFLITE_MODEL_PATH, '.tflite')
+    if backend == 'tflite-int8':
+        return derived_model_path(model_path, INT8_MODEL_PATH, '_int8.tflite')
+    if backend == 'heuristic':
+        from light_classifier import FALLBACK_MODEL_PATH
+        return FALLBACK_MODEL_PATH
+    return model_path
+
+_engines = {}
+_engines_lock = threading.RLock()
+# One lock per engine key, held while that engine loads, so loading a shadow
+# candidate never blocks lookups of the production engine
+_load_locks = {}
+
+def get_engine(backend=INFERENCE_BACKEND, model_path=MODEL_PATH, labels_path=LABELS_PATH, **options):
+    """
+    The shared GestureModel for a backend: loaded and warmed up on the first
+    call, then returned to every caller in the process. model is None when
+    neither the backend nor its fallback could be loaded.
+    """
+    key = (backend, model_path, labels_path, tuple(sorted(options.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+    with load_lock:
+        # Another thread may have loaded it while this one waited
+        with _engines_lock:
+            engine = _engines.get(key)
+        if engine is None:
+            engine = _load_engine(backend, model_path, labels_path, options)
+            with _engines_lock:
+                engine = _engines.setdefault(key, engine)
+        return engine
+
+def reload_engine(backend=INFERENCE_BACKEND, model_path=MODEL_PATH, labels_path=LABELS_PATH, **options):
+    """
+    Load and warm up a fresh GestureModel without holding the engine lock, then
+    swap it in for later get_engine() calls. Predictions that already hold the
+    old one finish on it, and it is freed once the last of them lets go.
+    The current model is kept if the new one cannot be loaded.
+    """
+    key = (backend, model_path, labels_path, tuple(sorted(options.items())))
+    engine = _load_engine(backend, model_path, labels_path, options, fresh=True)
+    with _engines_lock:
+        previous = _engines.get(key)
+        if engine.model is None and previous is not None and previous.model is not None:
+            print(f"Reloaded {backend} model could not be loaded, keeping version {previous.version}")
+            return previous
+        _engines[key] = engine
+    if previous is not None and previous is not engine:
+        weakref.finalize(previous, print, f"Previous model released ({previous.version})")
+    return engine
+
+def _load_engine(backend, model_path, labels_path, options, fresh=False):
+    if backend not in _backends:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {available_backends()}")
+    loader, fallback = _backends[backend]
+    labels = load_labels(labels_path)
+
+    start = time.perf_counter()
+    try:
+        model = loader(model_path, **options)
+    except Exception as e:
+        print(f"{backend} backend failed: {e}")
+        model = None
+    load_time = time.perf_counter() - start
+
+    if model is None and fallback is not None:
+        print(f"Falling back to the {fallback} backend")
+        # Same instance the fallback backend serves directly, not a second copy
+        if fresh:
+            return reload_engine(fallback, model_path, labels_path, **options)
+        return get_engine(fallback, model_path, labels_path, **options)
+
+    warmup_time = 0.0
+    version = 'fallback'
+    from light_classifier import FALLBACK_MODEL_PATH
+    if model is None and os.path.exists(FALLBACK_MODEL_PATH):
+        # Fallback predictions change when the light classifier is retrained
+        version = f"fallback:{file_digest(FALLBACK_MODEL_PATH)[:16]}"
+    if model is not None:
+        # The file actually loaded: model.tflite and model_int8.tflite answer differently from the .h5
+        source = getattr(model, 'model_path', None) or model_source_path(backend, model_path)
+        model_digest = file_digest(source) if os.path.exists(source) else backend
+        version = f"{model_digest}:{type(model).__name__}"
+        try:
+            warmup_time = warm_up_model(model)
+        except Exception as e:
+            print(f"Model warm-up failed: {e}")
+
+    # A labels-only change renames the classes, so cached predictions must not survive it
+    labels_digest = file_digest(labels_path)[:16] if os.path.exists(labels_path) else 'default-labels'
+    version = f"{version}:{labels_digest}"
+
+    print(f"Model ready ({backend}): load {load_time:.2f}s, warm-up {warmup_time:.2f}s")
+    return GestureModel(model, labels, load_time, warmup_time, version, backend=backend)
+
+def clear_engines():
+    """Forget every loaded backend; the next get_engine() loads from disk again"""
+    with _engines_lock:
+        _engines.clear()
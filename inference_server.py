@@ -0,0 +1,255 @@
+"""
+Headless HTTP gesture classification, sharing one warm model with every client.
+
+    python inference_server.py --port 8502
+
+    curl --data-binary @batu.jpg http://localhost:8502/predict
+    curl -F a=@batu.jpg -F b=@kertas.jpg http://localhost:8502/predict/batch
+    curl http://localhost:8502/readyz
+
+Built on asyncio streams from the standard library. Decoding and inference
+run in a thread pool behind a semaphore (bounded concurrency); requests
+beyond max_pending are refused with 503 instead of queueing without limit.
+Bodies are buffered before that semaphore, so their size and the number of
+open connections are capped too (at most max_connections x MAX_REQUEST_BYTES).
+InferenceServer.request() serves a request in-process, without a socket.
+"""
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import utils
+from image_io import MAX_IMAGE_BYTES, ImageTooLargeError, load_image
+
+MAX_BATCH_IMAGES = 32
+# Largest accepted body, single image or whole batch: one maximum-size photo plus multipart overhead
+MAX_BODY_BYTES = int(os.environ.get('MAX_REQUEST_BYTES', MAX_IMAGE_BYTES + 1024 * 1024))
+# Connections served at once; more get 503 before their body is read
+MAX_CONNECTIONS = int(os.environ.get('MAX_CONNECTIONS', 16))
+READ_TIMEOUT = 30.0
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class InferenceServer:
+    """Routes HTTP requests to utils.classify_image with bounded concurrency"""
+    def __init__(self, max_concurrency=4, max_pending=64):
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='inference')
+        self._pending = 0
+        self._loading = None
+        self.load_error = None
+        self.started_at = time.time()
+
+    def start_loading(self):
+        """Load and warm up the shared model without blocking the event loop"""
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().run_in_executor(self._executor, utils.get_model)
+            self._loading.add_done_callback(self._loaded)
+        return self._loading
+
+    def _loaded(self, future):
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            self.load_error = f"{type(error).__name__}: {error}" if error is not None else "loading cancelled"
+            print(f"❌ Model failed to load: {self.load_error}")
+            # The next /readyz starts another attempt
+            self._loading = None
+        else:
+            self.load_error = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """Serve one request in-process; returns (status, JSON-serializable payload)"""
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        try:
+            route = (method, path.split('?')[0])
+            if route == ('GET', '/healthz'):
+                return HTTPStatus.OK, {'status': 'ok', 'uptime_s': time.time() - self.started_at}
+            if route == ('GET', '/readyz'):
+                return self._readiness()
+            if route == ('POST', '/predict'):
+                return HTTPStatus.OK, await self._predict_one(body)
+            if route == ('POST', '/predict/batch'):
+                images = _multipart_files(headers.get('content-type', ''), body)
+                results = await asyncio.gather(*(self._predict_batch_item(data, name) for name, data in images))
+                return HTTPStatus.OK, {'results': results}
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+
+    def _readiness(self):
+        shared = utils.peek_model()
+        if shared is None:
+            if self.load_error is not None and self._loading is None:
+                self.start_loading()
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'ready': False, 'error': self.load_error}
+        return HTTPStatus.OK, {
+            'ready': True,
+            'backend': shared.backend,
+            'version': shared.version,
+            'fallback': shared.model is None
+        }
+
+    async def _predict_one(self, data, name=None):
+        if utils.peek_model() is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Model is still loading")
+        if not data:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Empty image")
+        if self._pending >= self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending requests")
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, _classify_bytes, data)
+        finally:
+            self._pending -= 1
+        if name is not None:
+            result = {'name': name, **result}
+        return result
+
+    async def _predict_batch_item(self, data, name):
+        """Like _predict_one, but a bad image fails only its own entry"""
+        try:
+            return await self._predict_one(data, name)
+        except HTTPError as e:
+            return {'name': name, 'error': e.message, 'status': e.status.value}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+def _classify_bytes(data):
+    """Decode and classify one image; runs on an executor thread"""
+    start = time.perf_counter()
+    try:
+        image = load_image(data)
+    except ImageTooLargeError as e:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, str(e))
+    except Exception as e:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Cannot decode image: {e}")
+    decoded = time.perf_counter()
+    label, confidence, probabilities = utils.classify_image(image)
+    done = time.perf_counter()
+    if label is None:
+        raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Prediction failed")
+    return {
+        'label': label,
+        'confidence': float(confidence),
+        'probabilities': probabilities,
+        'timing_ms': {
+            'decode': (decoded - start) * 1000,
+            'inference': (done - decoded) * 1000,
+            'total': (done - start) * 1000
+        }
+    }
+
+def _multipart_files(content_type, body):
+    """(field or file name, bytes) of every part of a multipart/form-data body"""
+    if not content_type.startswith('multipart/form-data'):
+        raise HTTPError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Expected multipart/form-data")
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+    )
+    if not message.is_multipart():
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed multipart body")
+    files = []
+    for part in message.iter_parts():
+        name = part.get_filename() or part.get_param('name', header='content-disposition')
+        files.append((name, part.get_payload(decode=True) or b''))
+    if not files:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "No images in the request")
+    if len(files) > MAX_BATCH_IMAGES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {MAX_BATCH_IMAGES} images per batch")
+    return files
+
+async def _read_request(reader, writer):
+    """(method, path, headers, body) of one HTTP/1.1 request"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+    method, path, _ = request_line.split(' ', 2)
+    headers = {}
+    for line in header_lines:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    if headers.get('expect', '').lower() == '100-continue':
+        # curl waits for this before sending large uploads
+        writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+def _write_response(writer, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode('latin-1') + body
+    )
+
+async def serve(host='0.0.0.0', port=8502, max_concurrency=4, max_pending=64, max_connections=MAX_CONNECTIONS):
+    server = InferenceServer(max_concurrency=max_concurrency, max_pending=max_pending)
+    server.start_loading()
+    open_connections = 0
+
+    async def handle(reader, writer):
+        nonlocal open_connections
+        if open_connections >= max_connections:
+            # Refused before anything is read, so idle or slow clients cannot pile up bodies
+            status, payload = HTTPStatus.SERVICE_UNAVAILABLE, {'error': "Too many open connections"}
+        else:
+            open_connections += 1
+            try:
+                method, path, headers, body = await asyncio.wait_for(_read_request(reader, writer), READ_TIMEOUT)
+                status, payload = await server.request(method, path, body, headers)
+            except HTTPError as e:
+                status, payload = e.status, {'error': e.message}
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, payload = HTTPStatus.BAD_REQUEST, {'error': "Malformed request"}
+            finally:
+                open_connections -= 1
+        try:
+            _write_response(writer, status, payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    listener = await asyncio.start_server(handle, host, port)
+    print(f"🚀 Inference server listening on http://{host}:{port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP gesture classification service")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--max-concurrency', type=int, default=4, help="Images decoded/classified at once")
+    parser.add_argument('--max-pending', type=int, default=64, help="Images waiting before requests get 503")
+    parser.add_argument('--max-connections', type=int, default=MAX_CONNECTIONS,
+                        help="Open connections before new ones get 503")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_concurrency, args.max_pending, args.max_connections))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
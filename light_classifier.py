@@ -0,0 +1,258 @@
+"""
+Lightweight fallback gesture classifier: HOG features and softmax regression
+in NumPy, used when the TensorFlow model cannot be loaded.
+
+    python light_classifier.py train dataset/ -o fallback_model.npz
+    python light_classifier.py evaluate dataset/ --model fallback_model.npz
+
+dataset/ holds one folder of photos per gesture (batu/, gunting/, kertas/),
+the layout Teachable Machine exports. Folder names are matched to labels.txt
+case-insensitively (Batu/ trains 'batu'), so the classifier answers with the
+labels the game uses; a folder matching no label is an error. The artifact is a few KB of arrays in
+an .npz file; loading it needs only NumPy and Pillow.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from PIL import Image
+from inference_engine import LABELS_PATH, load_labels
+
+FALLBACK_MODEL_PATH = os.environ.get('FALLBACK_MODEL_PATH', 'fallback_model.npz')
+# Photos are reduced to FEATURE_SIZE x FEATURE_SIZE grayscale, split into
+# CELL_SIZE x CELL_SIZE cells with ORIENTATION_BINS gradient directions each
+FEATURE_SIZE = 64
+CELL_SIZE = 8
+ORIENTATION_BINS = 9
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def to_gray(images, size=FEATURE_SIZE):
+    """PIL images or RGB/grayscale arrays as a float32 (N, size, size) batch in [0, 1]"""
+    batch = np.empty((len(images), size, size), dtype=np.float32)
+    for i, image in enumerate(images):
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image, dtype=np.uint8))
+        batch[i] = np.asarray(image.convert('L').resize((size, size), Image.BILINEAR), dtype=np.float32)
+    return batch / 255.0
+
+def hog_features(gray, cell_size=CELL_SIZE, bins=ORIENTATION_BINS):
+    """
+    Histograms of unsigned gradient orientation per cell, weighted by gradient
+    magnitude, for a whole (N, H, W) batch with one bincount
+    """
+    n, height, width = gray.shape
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, :, 1:-1] = gray[:, :, 2:] - gray[:, :, :-2]
+    gy[:, 1:-1, :] = gray[:, 2:, :] - gray[:, :-2, :]
+    magnitude = np.hypot(gx, gy)
+    orientation = np.arctan2(gy, gx) % np.pi
+    orientation_bin = np.minimum((orientation * (bins / np.pi)).astype(np.int64), bins - 1)
+
+    cells_y, cells_x = height // cell_size, width // cell_size
+    cell = (np.arange(height)[:, None] // cell_size) * cells_x + np.arange(width)[None, :] // cell_size
+    slot = (np.arange(n)[:, None, None] * (cells_y * cells_x) + cell) * bins + orientation_bin
+    histograms = np.bincount(slot.ravel(), weights=magnitude.ravel(), minlength=n * cells_y * cells_x * bins)
+    # Square root dampens strong edges, then each image is scaled to unit length
+    histograms = np.sqrt(histograms.reshape(n, -1))
+    return histograms / (np.linalg.norm(histograms, axis=1, keepdims=True) + 1e-6)
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class LightGestureClassifier:
+    """HOG features + softmax regression; no TensorFlow or OpenCV needed"""
+    def __init__(self, labels, mean, std, weights, bias,
+                 feature_size=FEATURE_SIZE, cell_size=CELL_SIZE, bins=ORIENTATION_BINS):
+        self.labels = list(labels)
+        self.mean = mean
+        self.std = std
+        self.weights = weights
+        self.bias = bias
+        self.feature_size = feature_size
+        self.cell_size = cell_size
+        self.bins = bins
+
+    @classmethod
+    def load(cls, path=FALLBACK_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                [str(label) for label in data['labels']], data['mean'], data['std'], data['weights'], data['bias'],
+                int(data['feature_size']), int(data['cell_size']), int(data['bins'])
+            )
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            np.savez_compressed(
+                file, labels=np.array(self.labels), mean=self.mean, std=self.std, weights=self.weights,
+                bias=self.bias, feature_size=self.feature_size, cell_size=self.cell_size, bins=self.bins
+            )
+        return path
+
+    def features(self, images):
+        return hog_features(to_gray(images, self.feature_size), self.cell_size, self.bins)
+
+    def predict_proba(self, images):
+        """(N, classes) probabilities for a list of images"""
+        x = (self.features(images) - self.mean) / self.std
+        return _softmax(x @ self.weights + self.bias)
+
+    def predict_batch(self, images):
+        probabilities = self.predict_proba(images)
+        indices = probabilities.argmax(axis=1)
+        return [(self.labels[index], float(p[index])) for index, p in zip(indices, probabilities)]
+
+    def predict(self, image):
+        """(label, confidence) for one image"""
+        return self.predict_batch([image])[0]
+
+def train(features, targets, labels, epochs=500, learning_rate=0.5, l2=1e-3):
+    """Fit softmax regression with full-batch gradient descent on standardized features"""
+    mean = features.mean(axis=0)
+    std = features.std(axis=0) + 1e-6
+    x = (features - mean) / std
+    onehot = np.eye(len(labels))[targets]
+    weights = np.zeros((x.shape[1], len(labels)))
+    bias = np.zeros(len(labels))
+    for _ in range(epochs):
+        gradient = (_softmax(x @ weights + bias) - onehot) / len(x)
+        weights -= learning_rate * (x.T @ gradient + l2 * weights)
+        bias -= learning_rate * gradient.sum(axis=0)
+    return LightGestureClassifier(labels, mean.astype(np.float32), std.astype(np.float32),
+                                  weights.astype(np.float32), bias.astype(np.float32))
+
+def load_dataset(data_dir, labels):
+    """
+    Photos from one sub-folder per label, folder names matched to labels
+    case-insensitively; returns (images, targets, labels).
+    Raises ValueError for a folder that matches no label.
+    """
+    folders = sorted(name for name in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, name)))
+    index_of = {label.lower(): index for index, label in enumerate(labels)}
+    unknown = [name for name in folders if name.lower() not in index_of]
+    if unknown:
+        raise ValueError(f"Folders {unknown} in {data_dir} match no label in {labels}")
+    missing = sorted(set(index_of) - {name.lower() for name in folders})
+    if missing:
+        print(f"⚠️ No photo folder for {missing}")
+    images, targets = [], []
+    for folder_name in folders:
+        index = index_of[folder_name.lower()]
+        folder = os.path.join(data_dir, folder_name)
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with Image.open(os.path.join(folder, name)) as image:
+                    images.append(image.convert('RGB').copy())
+                targets.append(index)
+    return images, np.array(targets, dtype=np.int64), labels
+
+def accuracy(model, images, targets):
+    predictions = model.predict_proba(images).argmax(axis=1)
+    return float((predictions == targets).mean())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or evaluate the lightweight fallback classifier")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train_parser = subparsers.add_parser('train', help="Train from one folder of photos per gesture")
+    train_parser.add_argument('data_dir')
+    train_parser.add_argument('-o', '--output', default=FALLBACK_MODEL_PATH)
+    train_parser.add_argument('--labels', default=LABELS_PATH, help="Labels the classifier answers with")
+    train_parser.add_argument('--holdout', type=float, default=0.2, help="Share of photos kept for the accuracy check")
+    train_parser.add_argument('--epochs', type=int, default=500)
+    train_parser.add_argument('--no-flip', action='store_true', help="Do not add mirrored copies of the training photos")
+    eval_parser = subparsers.add_parser('evaluate', help="Accuracy and latency on a labelled folder")
+    eval_parser.add_argument('data_dir')
+    eval_parser.add_argument('--model', default=FALLBACK_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'evaluate':
+        model = LightGestureClassifier.load(args.model)
+        try:
+            images, targets, _ = load_dataset(args.data_dir, model.labels)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        start = time.perf_counter()
+        for image in images:
+            model.predict(image)
+        per_image_ms = (time.perf_counter() - start) * 1000 / max(len(images), 1)
+        print(f"📊 Accuracy {accuracy(model, images, targets):.1%} on {len(images)} photos, {per_image_ms:.2f} ms/photo")
+        return 0
+
+    try:
+        images, targets, labels = load_dataset(args.data_dir, load_labels(args.labels))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if not images:
+        print(f"❌ No photos found in {args.data_dir}")
+        return 1
+    print(f"📂 {len(images)} photos, labels {labels}")
+
+    def fit(indices):
+        selected = [images[i] for i in indices]
+        selected_targets = targets[indices]
+        if not args.no_flip:
+            # Left and right hands: mirrored photos are valid examples of the same gesture
+            selected = selected + [image.transpose(Image.FLIP_LEFT_RIGHT) for image in selected]
+            selected_targets = np.concatenate([selected_targets, selected_targets])
+        features = hog_features(to_gray(selected))
+        return train(features, selected_targets, labels, epochs=args.epochs)
+
+    order = np.random.default_rng(0).permutation(len(images))
+    holdout_count = int(len(images) * args.holdout)
+    if holdout_count:
+        holdout, training = order[:holdout_count], order[holdout_count:]
+        model = fit(training)
+        holdout_images = [images[i] for i in holdout]
+        print(f"📊 Holdout accuracy {accuracy(model, holdout_images, targets[holdout]):.1%} "
+              f"({holdout_count} photos)")
+
+    # The shipped model is trained on every photo
+    model = fit(order)
+    model.save(args.output)
+    print(f"✅ Saved {args.output} ({os.path.getsize(args.output) / 1024:.1f} KB)")
+    return 0
+
+# path -> (file stamp, LightGestureClassifier or False when missing/unusable)
+_light_classifiers = {}
+
+def _file_stamp(path):
+    """(mtime, size) of path, None when it does not exist; changes whenever the artifact is retrained"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def get_light_classifier(path=FALLBACK_MODEL_PATH):
+    """
+    The shared trained fallback classifier, None when no artifact has been
+    trained. Reloaded when the file changes, so a retrain reaches the engine
+    that hot-reloads for it.
+    """
+    stamp = _file_stamp(path)
+    cached = _light_classifiers.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1] or None
+    if stamp is None:
+        model = False
+        print(f"No fallback model at {path}; train one with light_classifier.py")
+    else:
+        try:
+            model = LightGestureClassifier.load(path)
+            labels = load_labels()
+            if sorted(model.labels) != sorted(labels):
+                raise ValueError(f"trained for {model.labels}, labels.txt has {labels}; retrain it")
+            print(f"Fallback model loaded from {path}")
+        except Exception as e:
+            model = False
+            print(f"Cannot load fallback model {path}: {e}")
+    _light_classifiers[path] = (stamp, model)
+    return model or None
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Continuous gesture classification from a webcam or a video file.
+
+    python live_video.py                 # webcam 0, window with overlay
+    python live_video.py clip.mp4 --no-display
+
+Capture and inference run on separate threads joined by a one-slot mailbox:
+a new frame replaces any frame inference has not picked up yet, so the model
+always sees the newest frame and a slow model drops frames instead of
+building a backlog.
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+
+class LatestFrameSlot:
+    """One-slot mailbox between capture and inference; put() overwrites unread frames"""
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame = None
+        self._captured_at = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, frame, captured_at):
+        with self._condition:
+            if self._frame is not None:
+                self.dropped += 1
+            self._frame = frame
+            self._captured_at = captured_at
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """Wait for a frame newer than the last one returned; None once closed"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._closed, timeout=timeout)
+            if self._frame is None:
+                return None
+            frame, captured_at = self._frame, self._captured_at
+            self._frame = None
+            return frame, captured_at
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+class LiveResult:
+    """Latest classification, its frame and when that frame was captured"""
+    def __init__(self, frame, label, confidence, probabilities, captured_at, classified_at):
+        self.frame = frame
+        self.label = label
+        self.confidence = confidence
+        self.probabilities = probabilities
+        self.captured_at = captured_at
+        self.classified_at = classified_at
+
+class LiveGestureClassifier:
+    """
+    Reads frames on one thread and classifies the newest one on another.
+    classify_fn takes a uint8 RGB frame and returns (label, confidence, probabilities).
+    With hand_roi, only a padded crop around the tracked hand reaches the model.
+    With motion_threshold set, unchanged frames reuse the last result (MotionGate).
+    """
+    def __init__(self, source=0, classify_fn=None, realtime=None, motion_threshold=None, hand_roi=False):
+        self.source = source
+        self.classify_fn = classify_fn or classify_with_shared_model
+        self.hand_tracker = None
+        if hand_roi:
+            from hand_roi import HandTracker
+            self.hand_tracker = HandTracker()
+            model_fn = self.classify_fn
+            self.classify_fn = lambda frame: model_fn(self.hand_tracker.crop(frame))
+        self.motion_gate = None
+        if motion_threshold is not None:
+            from motion_gate import MotionGate
+            self.motion_gate = MotionGate(self.classify_fn, threshold=motion_threshold)
+            self.classify_fn = self.motion_gate
+        # Video files are read at their own frame rate unless realtime=False
+        self.realtime = (not isinstance(source, int)) if realtime is None else realtime
+        self.slot = LatestFrameSlot()
+        self.frames_received = 0
+        self.frames_processed = 0
+        self._latencies = deque(maxlen=1000)
+        self._latest = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self.finished = threading.Event()
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='live-capture', daemon=True),
+            threading.Thread(target=self._inference_loop, name='live-inference', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.slot.close()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def latest(self):
+        """Most recent LiveResult, or None before the first frame is classified"""
+        with self._lock:
+            return self._latest
+
+    def mark_displayed(self, result):
+        """Record capture-to-display latency once a result is shown to the player"""
+        with self._lock:
+            self._latencies.append(time.perf_counter() - result.captured_at)
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            stats = {
+                'frames_received': self.frames_received,
+                'frames_processed': self.frames_processed,
+                'frames_dropped': self.slot.dropped,
+                'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            }
+        if self.motion_gate is not None:
+            stats['motion_gate'] = self.motion_gate.stats()
+        if self.hand_tracker is not None:
+            stats['hand_roi'] = self.hand_tracker.stats()
+        return stats
+
+    def _capture_loop(self):
+        import cv2
+        capture = cv2.VideoCapture(self.source)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_interval = 1.0 / fps
+        next_frame_at = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                captured_at = time.perf_counter()
+                self.frames_received += 1
+                self.slot.put(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), captured_at)
+                if self.realtime:
+                    next_frame_at += frame_interval
+                    time.sleep(max(0.0, next_frame_at - time.perf_counter()))
+        finally:
+            capture.release()
+            self.slot.close()
+
+    def _inference_loop(self):
+        try:
+            while not self._stop.is_set():
+                item = self.slot.get(timeout=0.5)
+                if item is None:
+                    if self.slot.closed:
+                        break
+                    continue
+                frame, captured_at = item
+                label, confidence, probabilities = self.classify_fn(frame)
+                with self._lock:
+                    self.frames_processed += 1
+                    self._latest = LiveResult(frame, label, confidence, probabilities, captured_at, time.perf_counter())
+        finally:
+            self.finished.set()
+
+def classify_with_shared_model(frame):
+    """Classify one frame with the shared model (no prediction cache: live frames never repeat)"""
+    import utils
+    shared = utils.get_model()
+    if shared.model is None:
+        from simple_classifier import get_classifier
+        label, confidence = get_classifier().predict_simple(frame)
+        return label, float(confidence), None
+    probabilities = shared.model.predict_raw(frame)[0]
+    index = int(np.argmax(probabilities))
+    return shared.labels[index], float(probabilities[index]), probabilities
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live gesture classification")
+    parser.add_argument('source', nargs='?', default='0', help="Webcam index or video file (default: 0)")
+    parser.add_argument('--no-display', action='store_true', help="Print results instead of opening a window")
+    parser.add_argument('--as-fast-as-possible', action='store_true',
+                        help="Read video files without pacing them to their frame rate")
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help="Skip the model while the scene changes less than this (mean gray level, e.g. 6)")
+    parser.add_argument('--hand-roi', action='store_true',
+                        help="Track the hand and classify only a padded crop around it")
+    args = parser.parse_args(argv)
+
+    import cv2
+    from utils import get_emoji_for_choice
+    source = int(args.source) if args.source.isdigit() else args.source
+    live = LiveGestureClassifier(
+        source,
+        realtime=False if args.as_fast_as_possible else None,
+        motion_threshold=args.motion_threshold,
+        hand_roi=args.hand_roi
+    )
+
+    last_shown = None
+    with live:
+        while not live.finished.is_set():
+            result = live.latest()
+            if result is not None and result is not last_shown:
+                last_shown = result
+                live.mark_displayed(result)
+                if args.no_display:
+                    print(f"{get_emoji_for_choice(result.label)} {result.label} {result.confidence:.1%}")
+            if args.no_display:
+                time.sleep(0.005)
+                continue
+            if last_shown is not None:
+                canvas = cv2.cvtColor(last_shown.frame, cv2.COLOR_RGB2BGR)
+                text = f"{last_shown.label} {last_shown.confidence:.0%}"
+                cv2.putText(canvas, text, (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 2)
+                cv2.imshow('Batu Gunting Kertas - Live', canvas)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    print(live.stats())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
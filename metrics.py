@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Port of the Prometheus text endpoint; empty disables it
+METRICS_PORT = os.environ.get('METRICS_PORT', '9464')
+# Interface the endpoint binds to; localhost unless METRICS_HOST=0.0.0.0 is set for a scraper
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+# Latency buckets in seconds, from a cache hit to a cold TensorFlow call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in sorted(labels)) + '}'
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.total += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing the q-th quantile (None when empty)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        for bound, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+class MetricsRegistry:
+    """Thread-safe counters, histograms and callback gauges for the whole process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """Add value to a histogram; buckets only apply when it is first created"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name, fn):
+        """Register a gauge whose value is read from fn() at render time"""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self):
+        """Plain-dict view for the admin panel"""
+        with self._lock:
+            counters = {name + _label_text(labels): value for (name, labels), value in self._counters.items()}
+            histograms = {
+                name + _label_text(labels): {
+                    'count': h.count,
+                    'mean': h.total / h.count if h.count else None,
+                    'p50': h.quantile(0.5),
+                    'p95': h.quantile(0.95)
+                }
+                for (name, labels), h in self._histograms.items()
+            }
+            gauges = dict(self._gauges)
+        return {
+            'counters': dict(sorted(counters.items())),
+            'histograms': dict(sorted(histograms.items())),
+            'gauges': {name: _read_gauge(fn) for name, fn in sorted(gauges.items())}
+        }
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_label_text(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            for bound, cumulative in zip(histogram.buckets, histogram.counts):
+                bucket_labels = labels + (('le', repr(bound)),)
+                lines.append(f"{name}_bucket{_label_text(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_label_text(labels)} {histogram.total}")
+            lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+
+        for name, fn in gauges:
+            value = _read_gauge(fn)
+            if value is None:
+                continue
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+def _read_gauge(fn):
+    try:
+        return fn()
+    except Exception:
+        return None
+
+# Process-wide registry used by the app, utils and the metrics endpoint
+registry = MetricsRegistry()
+registry.describe('image_decode_seconds', "Decoding camera/upload photos in player_turn")
+registry.describe('preprocess_seconds', "RGB conversion and resize to the model input before each prediction")
+registry.describe('hand_roi_seconds', "Hand detection and crop before classification (HAND_ROI=1)")
+registry.describe('inference_seconds', "Model forward passes for predict_gesture, without batch queueing")
+registry.describe('batch_wait_seconds', "Time predict_gesture requests wait for a micro-batch to run (INFERENCE_BATCH_SIZE > 1)")
+registry.describe('fallback_seconds', "Heuristic fallback classifier calls")
+registry.describe('script_run_seconds', "Streamlit script reruns")
+registry.describe('predictions_total', "Predictions by path (model or fallback)")
+registry.describe('prediction_cache_total', "Prediction cache lookups by result")
+registry.describe('low_confidence_total', "Turns where the AI was not sure and offered manual selection")
+registry.describe('batch_queue_depth', "Requests waiting in the micro-batching queue")
+registry.describe('batch_mean_size', "Mean frames per model call in the micro-batching scheduler")
+registry.describe('prediction_cache_entries', "Entries in the in-memory prediction cache")
+registry.describe('prediction_cache_bytes', "Approximate size of the in-memory prediction cache")
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics in Prometheus text format on a daemon thread (once per process)"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            # False after a failed start: do not retry on every rerun
+            return _server or None
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+        except OSError as e:
+            print(f"Metrics endpoint not started on port {port}: {e}")
+            _server = False
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+        return _server
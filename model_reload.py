@@ -0,0 +1,96 @@
+import os
+import threading
+from inference_engine import INFERENCE_BACKEND, LABELS_PATH, MODEL_PATH, file_digest, model_source_path, reload_engine
+from metrics import registry as metrics
+
+# Seconds between checks of keras_model.h5, labels.txt and the file the backend
+# loads (e.g. model_int8.tflite); 0 disables hot reload
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 10))
+
+metrics.describe('model_reloads_total', "Model hot reloads by result")
+
+class ModelWatcher:
+    """
+    Polls the model and labels files, plus the backend's own model file. A changed mtime only triggers a reload
+    when the SHA-256 changed too, so copying the same file again is ignored.
+    The new model is loaded and warmed up on the watcher thread, then swapped
+    in by inference_engine.reload_engine().
+    """
+    def __init__(self, backend=INFERENCE_BACKEND, model_path=MODEL_PATH, labels_path=LABELS_PATH,
+                 interval=MODEL_RELOAD_INTERVAL, on_reload=None):
+        self.backend = backend
+        self.model_path = model_path
+        self.labels_path = labels_path
+        self.interval = interval
+        self.on_reload = on_reload
+        # tflite reconverts when the .h5 changes; tflite-int8 loads its own file
+        self.paths = tuple(dict.fromkeys((model_path, labels_path, model_source_path(backend, model_path))))
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._mtimes = self._read_mtimes()
+        self._digests = self._read_digests()
+
+    def _read_mtimes(self):
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else None
+                     for path in self.paths)
+
+    def _read_digests(self):
+        return tuple(file_digest(path) if os.path.exists(path) else None
+                     for path in self.paths)
+
+    def check(self):
+        """Reload if the files changed since the last check; True when a new model was swapped in"""
+        mtimes = self._read_mtimes()
+        if mtimes == self._mtimes:
+            return False
+        self._mtimes = mtimes
+        digests = self._read_digests()
+        if digests == self._digests:
+            return False
+        self._digests = digests
+
+        print(f"Model files changed, reloading {self.model_path} in the background")
+        try:
+            engine = reload_engine(self.backend, self.model_path, self.labels_path)
+        except Exception as e:
+            print(f"Model reload failed, keeping the current model: {e}")
+            metrics.inc('model_reloads_total', result='failed')
+            return False
+        metrics.inc('model_reloads_total', result='swapped')
+        self.reloads += 1
+        print(f"Model swapped in: version {engine.version}")
+        if self.on_reload is not None:
+            self.on_reload(engine)
+        return True
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # A half-written file can fail to stat/hash; try again next round
+                print(f"Model watcher check failed: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='model-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+def start_model_watcher(on_reload=None, interval=MODEL_RELOAD_INTERVAL):
+    """Start the process-wide watcher once; None when hot reload is disabled"""
+    global _watcher
+    if interval <= 0:
+        return None
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = ModelWatcher(interval=interval, on_reload=on_reload).start()
+        return _watcher
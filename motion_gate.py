@@ -0,0 +1,78 @@
+import os
+import threading
+import numpy as np
+
+# Mean absolute grayscale difference (0-255) on the thumbnail that counts as a change
+MOTION_THRESHOLD = float(os.environ.get('MOTION_THRESHOLD', 6.0))
+THUMBNAIL_SIZE = (32, 24)
+
+class MotionGate:
+    """
+    Wraps a frame classifier and reuses its last result while the scene is
+    unchanged, judged on a tiny grayscale thumbnail (the same grayscale
+    analysis SimpleGestureClassifier.predict_simple uses, at 32x24).
+    The reference thumbnail only moves when the model runs, so slow drift
+    still triggers a new inference eventually.
+    """
+    def __init__(self, classify_fn, threshold=MOTION_THRESHOLD, thumbnail_size=THUMBNAIL_SIZE, max_skips=None):
+        self.classify_fn = classify_fn
+        self.threshold = threshold
+        self.thumbnail_size = thumbnail_size
+        # Force an inference after this many consecutive skips (None = never)
+        self.max_skips = max_skips
+        self._reference = None
+        self._last_result = None
+        self._consecutive_skips = 0
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.skipped = 0
+
+    def thumbnail(self, frame):
+        """Downscale first, then grayscale: both steps touch only a few hundred pixels"""
+        import cv2
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        return small
+
+    def difference(self, thumbnail):
+        """Mean absolute difference against the reference, inf when there is none"""
+        if self._reference is None:
+            return float('inf')
+        import cv2
+        return float(np.mean(cv2.absdiff(thumbnail, self._reference)))
+
+    def __call__(self, frame):
+        thumbnail = self.thumbnail(frame)
+        with self._lock:
+            self.frames += 1
+            unchanged = self.difference(thumbnail) <= self.threshold
+            if unchanged and self.max_skips is not None and self._consecutive_skips >= self.max_skips:
+                unchanged = False
+            if unchanged and self._last_result is not None:
+                self.skipped += 1
+                self._consecutive_skips += 1
+                return self._last_result
+
+        result = self.classify_fn(frame)
+        with self._lock:
+            self._reference = thumbnail
+            self._last_result = result
+            self._consecutive_skips = 0
+        return result
+
+    def reset(self):
+        """Forget the reference so the next frame always runs the model"""
+        with self._lock:
+            self._reference = None
+            self._last_result = None
+            self._consecutive_skips = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'inferences': self.frames - self.skipped,
+                'skipped': self.skipped,
+                'skip_ratio': self.skipped / self.frames if self.frames else 0.0
+            }
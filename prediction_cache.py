@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Rough per-entry overhead of the OrderedDict slot, key string and tuple
+_ENTRY_OVERHEAD = 200
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions keyed by image content and model version,
+    with an optional directory on disk that survives restarts
+    """
+    def __init__(self, max_entries=1024, max_bytes=4 * 1024 * 1024, disk_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes, model_version):
+        """Hash the raw image bytes together with the model version"""
+        digest = hashlib.sha256()
+        digest.update(str(model_version).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached (label, confidence) or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store a (label, confidence) prediction"""
+        label, confidence = value
+        value = (label, float(confidence))
+        with self._lock:
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    def clear(self):
+        """Drop every in-memory entry (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current memory usage"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _store(self, key, value):
+        # Caller must hold the lock
+        if key in self._entries:
+            self._total_bytes -= self._sizes[key]
+        size = _ENTRY_OVERHEAD + len(key) + len(str(value[0]))
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self._total_bytes += size
+
+        # Evict least recently used entries until both limits hold
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            old_key, _ = self._entries.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(old_key)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r') as file:
+                data = json.load(file)
+            return data['label'], float(data['confidence'])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading cached prediction: {e}")
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump({'label': value[0], 'confidence': value[1]}, file)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing cached prediction: {e}")
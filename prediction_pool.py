@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import registry as metrics
+
+# Threads running predict_gesture for every session of the server process;
+# unset means one per INFERENCE_BATCH_SIZE slot (see utils.get_prediction_pool)
+PREDICTION_WORKERS = int(os.environ['PREDICTION_WORKERS']) if os.environ.get('PREDICTION_WORKERS') else None
+# Predictions allowed to wait for a free thread; more are refused (PoolFullError)
+PREDICTION_QUEUE_LIMIT = int(os.environ.get('PREDICTION_QUEUE_LIMIT', 32))
+# Seconds a session waits for one prediction before giving up on it
+PREDICTION_TIMEOUT = float(os.environ.get('PREDICTION_TIMEOUT', 10))
+
+metrics.describe('prediction_pool_rejected_total', "Predictions refused because the worker pool queue was full")
+metrics.describe('prediction_pool_in_flight', "Predictions running or waiting in the worker pool")
+
+class PoolFullError(RuntimeError):
+    """The worker pool already holds max_workers + max_queue predictions"""
+
+class PendingPrediction:
+    """A submitted prediction and when it was submitted"""
+    def __init__(self, future):
+        self.future = future
+        self.submitted_at = time.monotonic()
+
+    def expired(self, timeout=PREDICTION_TIMEOUT):
+        return not self.future.done() and time.monotonic() - self.submitted_at > timeout
+
+class PredictionPool:
+    """
+    Thread pool with a bound on running plus queued work, so a burst of
+    uploads from many sessions is refused early instead of piling up
+    """
+    def __init__(self, max_workers=PREDICTION_WORKERS or 4, max_queue=PREDICTION_QUEUE_LIMIT):
+        self.capacity = max_workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction')
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """PendingPrediction for fn(*args, **kwargs); raises PoolFullError at capacity"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                metrics.inc('prediction_pool_rejected_total')
+                raise PoolFullError(f"{self.in_flight} predictions already pending")
+            self.in_flight += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        # Also runs when a queued prediction is cancelled after a timeout
+        future.add_done_callback(self._release)
+        return PendingPrediction(future)
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': self.in_flight, 'capacity': self.capacity, 'rejected': self.rejected}
@@ -0,0 +1,132 @@
+"""
+Post-training full-integer (int8) quantization of the gesture model.
+
+Calibrates on the bundled sample images plus any extra folders, writes a
+.tflite model with uint8 input/output and reports how far the quantized
+model drifts from the float Keras model on the reference images.
+
+    python quantize_model.py --images-dir photos/ --check
+"""
+import argparse
+import glob
+import os
+import sys
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+
+from fast_inference import preprocess_batch
+from inference_engine import INPUT_SIZE, INT8_MODEL_PATH, MODEL_PATH, load_keras_model, load_labels
+from tflite_backend import TFLiteGestureModel
+
+REFERENCE_IMAGES = ['batu.jpg', 'gunting.jpg', 'gunting-2.jpg', 'kertas.jpg']
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def collect_images(folders=()):
+    """Reference images followed by every image found in the given folders"""
+    paths = [path for path in REFERENCE_IMAGES if os.path.exists(path)]
+    for folder in folders:
+        for path in sorted(glob.glob(os.path.join(folder, '**', '*'), recursive=True)):
+            if path.lower().endswith(IMAGE_EXTENSIONS) and path not in paths:
+                paths.append(path)
+    return paths
+
+def load_batches(paths):
+    """Preprocessed float32 batches of one image each, with the paths that loaded"""
+    loaded_paths, batches = [], []
+    for path in paths:
+        try:
+            with Image.open(path) as image:
+                batch = preprocess_batch([image.convert('RGB')], INPUT_SIZE)
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+        loaded_paths.append(path)
+        batches.append(batch)
+    return loaded_paths, batches
+
+def convert_to_int8(keras_model, calibration_batches, output_path=INT8_MODEL_PATH):
+    """Full-integer quantization calibrated on the given batches"""
+    def representative_dataset():
+        for batch in calibration_batches:
+            yield [batch]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    tflite_model = converter.convert()
+
+    with open(output_path, 'wb') as file:
+        file.write(tflite_model)
+    print(f"✅ Int8 model written to {output_path} ({len(tflite_model) / 1024:.0f} KB)")
+    return output_path
+
+def compare_models(float_model, int8_model, paths, batches, labels):
+    """Per-image top-1 agreement and probability drift between the two models"""
+    report = []
+    for path, batch in zip(paths, batches):
+        float_probs = float_model.predict(batch, verbose=0)[0]
+        int8_probs = int8_model.predict(batch)[0]
+        float_index = int(np.argmax(float_probs))
+        int8_index = int(np.argmax(int8_probs))
+        report.append({
+            'image': path,
+            'float_label': labels[float_index],
+            'int8_label': labels[int8_index],
+            'agree': float_index == int8_index,
+            'max_drift': float(np.max(np.abs(float_probs - int8_probs)))
+        })
+    return report
+
+def print_report(report):
+    for row in report:
+        status = '✅' if row['agree'] else '❌'
+        print(f"{status} {row['image']}: float={row['float_label']} int8={row['int8_label']} "
+              f"max drift={row['max_drift']:.4f}")
+    agreement = sum(row['agree'] for row in report) / max(len(report), 1)
+    print(f"📊 Top-1 agreement: {agreement:.1%} over {len(report)} images")
+    return agreement
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize the gesture model to int8")
+    parser.add_argument('--model', default=MODEL_PATH, help="Keras model to quantize")
+    parser.add_argument('--output', default=INT8_MODEL_PATH, help="Where to write the int8 .tflite model")
+    parser.add_argument('--images-dir', action='append', default=[],
+                        help="Extra folder of calibration images (repeatable)")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with an error if agreement on the reference images drops")
+    parser.add_argument('--min-agreement', type=float, default=1.0,
+                        help="Minimum top-1 agreement on the reference images for --check")
+    args = parser.parse_args(argv)
+
+    keras_model = load_keras_model(args.model)
+    if keras_model is None:
+        print("❌ Cannot load the float model")
+        return 1
+
+    paths = collect_images(args.images_dir)
+    paths, batches = load_batches(paths)
+    if not batches:
+        print("❌ No calibration images found")
+        return 1
+    print(f"🔧 Calibrating on {len(batches)} images...")
+
+    convert_to_int8(keras_model, batches, args.output)
+    int8_model = TFLiteGestureModel(args.output)
+    labels = load_labels()
+
+    report = compare_models(keras_model, int8_model, paths, batches, labels)
+    print_report(report)
+
+    reference = [row for row in report if row['image'] in REFERENCE_IMAGES]
+    reference_agreement = sum(row['agree'] for row in reference) / max(len(reference), 1)
+    if args.check and reference_agreement < args.min_agreement:
+        print(f"❌ Reference agreement {reference_agreement:.1%} is below {args.min_agreement:.1%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+from metrics import registry as metrics
+
+# Candidate model served in shadow next to production: set SHADOW_BACKEND
+# (e.g. tflite-int8) and/or SHADOW_MODEL_PATH (e.g. a retrained .h5)
+SHADOW_BACKEND = os.environ.get('SHADOW_BACKEND')
+SHADOW_MODEL_PATH = os.environ.get('SHADOW_MODEL_PATH')
+# Share of production predictions also sent to the candidate
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1))
+# Frames waiting for the candidate; more are dropped rather than slowing production
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', 64))
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+
+metrics.describe('shadow_latency_seconds', "Model call latency by model (production or candidate) on shadowed frames")
+metrics.describe('shadow_confidence', "Top-1 confidence by model on shadowed frames")
+metrics.describe('shadow_comparisons_total', "Shadowed frames by top-1 agreement with production")
+metrics.describe('shadow_dropped_total', "Frames not shadowed because the candidate queue was full")
+metrics.describe('shadow_agreement', "Share of shadowed frames where the candidate's top-1 label matches production")
+
+class ShadowRunner:
+    """
+    Sends a sample of production frames to a candidate model on a background
+    thread and compares the answers. Nothing here ever reaches the player:
+    offer() only enqueues, and a full queue drops the frame.
+    load_candidate() returns a GestureModel and runs on the worker thread, so
+    loading the candidate does not delay the first production prediction.
+    The runner turns itself off when the candidate is not the requested
+    backend (a failed tflite load falls back to keras) or is the production
+    engine itself: comparing production with itself proves nothing.
+    Production latency is the forward pass the caller already timed, without
+    the batch queue wait; the production model is never run a second time.
+    """
+    def __init__(self, load_candidate, backend=None, load_production=None,
+                 sample_rate=SHADOW_SAMPLE_RATE, max_queue=SHADOW_QUEUE_SIZE):
+        self.load_candidate = load_candidate
+        self.backend = backend
+        self.load_production = load_production
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._latencies = {'production': deque(maxlen=1000), 'candidate': deque(maxlen=1000)}
+        self._confidences = {'production': deque(maxlen=1000), 'candidate': deque(maxlen=1000)}
+        self.compared = 0
+        self.agreed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.candidate_version = None
+        self._worker = threading.Thread(target=self._run, name='shadow-model', daemon=True)
+        self._worker.start()
+
+    def offer(self, frame, label, confidence, latency):
+        """Maybe shadow one production prediction and its forward-pass seconds; never blocks"""
+        if random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait((frame, label, float(confidence), latency))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            metrics.inc('shadow_dropped_total')
+            return False
+
+    def _refusal(self, candidate):
+        """Why candidate cannot be compared with production, None when it can"""
+        if candidate is None or candidate.model is None:
+            return "candidate unavailable"
+        if self.backend is not None and candidate.backend != self.backend:
+            return f"{self.backend} candidate fell back to the {candidate.backend} backend"
+        if self.load_production is not None and candidate is self.load_production():
+            return "candidate is the production model itself"
+        return None
+
+    def _run(self):
+        try:
+            candidate = self.load_candidate()
+        except Exception as e:
+            print(f"Shadow candidate failed to load, shadow mode off: {e}")
+            candidate = None
+        refusal = self._refusal(candidate)
+        if refusal is not None:
+            print(f"Shadow mode off: {refusal}")
+            self.sample_rate = 0.0
+            return
+        self.candidate_version = candidate.version
+        print(f"Shadow mode: comparing against {candidate.backend} model {candidate.version}")
+
+        while True:
+            frame, label, confidence, latency = self._queue.get()
+            try:
+                start = time.perf_counter()
+                probabilities = candidate.model.predict_raw(frame[np.newaxis])[0]
+                candidate_latency = time.perf_counter() - start
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"Shadow prediction failed: {e}")
+                continue
+            index = int(np.argmax(probabilities))
+            self._record(label, confidence, latency,
+                         candidate.labels[index], float(probabilities[index]), candidate_latency)
+
+    def _record(self, label, confidence, latency, candidate_label, candidate_confidence, candidate_latency):
+        agree = candidate_label == label
+        with self._lock:
+            self.compared += 1
+            self.agreed += agree
+            self._latencies['production'].append(latency)
+            self._latencies['candidate'].append(candidate_latency)
+            self._confidences['production'].append(confidence)
+            self._confidences['candidate'].append(candidate_confidence)
+        metrics.inc('shadow_comparisons_total', result='agree' if agree else 'disagree')
+        metrics.observe('shadow_latency_seconds', latency, model='production')
+        metrics.observe('shadow_latency_seconds', candidate_latency, model='candidate')
+        metrics.observe('shadow_confidence', confidence, buckets=CONFIDENCE_BUCKETS, model='production')
+        metrics.observe('shadow_confidence', candidate_confidence, buckets=CONFIDENCE_BUCKETS, model='candidate')
+
+    def stats(self):
+        """Agreement rate and per-model latency/confidence percentiles"""
+        with self._lock:
+            stats = {
+                'candidate_version': self.candidate_version,
+                'compared': self.compared,
+                'agreement': self.agreed / self.compared if self.compared else None,
+                'dropped': self.dropped,
+                'errors': self.errors,
+            }
+            for model in ('production', 'candidate'):
+                latencies = np.array(self._latencies[model]) * 1000
+                confidences = np.array(self._confidences[model])
+                stats[model] = {
+                    'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+                    'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+                    'confidence_mean': float(confidences.mean()) if len(confidences) else None,
+                    'confidence_p10': float(np.percentile(confidences, 10)) if len(confidences) else None,
+                }
+        return stats
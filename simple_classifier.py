@@ -1,7 +1,9 @@
-import tensorflow as tf
 import numpy as np
 from PIL import Image
-import cv2
+from inference_engine import load_labels
+from light_classifier import get_light_classifier
+
+# TensorFlow and OpenCV are imported on first use, not when the module loads
 
 class SimpleGestureClassifier:
     """
@@ -9,28 +11,64 @@ class SimpleGestureClassifier:
     has compatibility issues with TensorFlow version
     """
     def __init__(self):
-        self.labels = ['batu', 'gunting', 'kertas']
-        # Simulate model responses based on simple image features
-        self.model_loaded = False
+        # Same labels and order as the shared engine, so HeuristicModel probabilities line up
+        self.labels = load_labels()
+        # Set by load_model(): predict with the shared engine's current model
+        self.use_shared_model = False
 
     def load_model(self):
-        """Try to load the original model, fallback to simple classifier"""
+        """
+        Use the process-wide shared model (no second copy of the weights),
+        fallback to simple classifier. The engine is looked up on every call,
+        so a hot reload reaches this classifier and the old model can be freed.
+        """
         try:
-            self.original_model = tf.keras.models.load_model('keras_model.h5', compile=False)
-            self.model_loaded = True
-            print("Original model loaded successfully")
-            return True
+            from inference_engine import get_engine
+            engine = get_engine()
+            self.use_shared_model = True
+            if engine.model is not None:
+                print(f"Using shared {engine.backend} model")
+            else:
+                print("Cannot load original model, using simple classifier")
+            return engine.model is not None
         except Exception as e:
             print(f"Cannot load original model: {e}")
-            self.model_loaded = False
+            self.use_shared_model = False
             return False
 
+    def shared_engine(self):
+        """The current shared GestureModel, None before load_model() or in demo mode"""
+        if not self.use_shared_model:
+            return None
+        from inference_engine import get_engine
+        engine = get_engine()
+        return engine if engine.model is not None else None
+
+    @property
+    def model_loaded(self):
+        return self.shared_engine() is not None
+
     def predict_simple(self, image):
         """
-        Simple prediction based on image features
-        This is a fallback when the original model fails
+        Fallback when the original model fails: the trained light classifier
+        (light_classifier.py) when its artifact exists, else the feature heuristic
+        """
+        light = get_light_classifier()
+        if light is not None:
+            try:
+                return light.predict(image)
+            except Exception as e:
+                print(f"Fallback model prediction failed: {e}")
+        return self._predict_heuristic(image)
+
+    def _predict_heuristic(self, image):
+        """
+        Simple prediction based on image features, no better than a guess;
+        only used when no fallback model has been trained
         """
         try:
+            import cv2
+
             # Convert PIL Image to numpy array
             if isinstance(image, Image.Image):
                 img_array = np.array(image)
@@ -74,16 +112,82 @@ class SimpleGestureClassifier:
             confidence = 0.6
             return prediction, confidence
 
+    def predict_simple_batch(self, images):
+        """predict_simple for many images at once, with the same answers"""
+        light = get_light_classifier()
+        if light is not None:
+            try:
+                return light.predict_batch(images)
+            except Exception as e:
+                print(f"Fallback model batch prediction failed: {e}")
+        return self._predict_heuristic_batch(images)
+
+    def _predict_heuristic_batch(self, images):
+        """
+        _predict_heuristic for many images: frames are resized and stacked into
+        one uint8 array, grayscale is one cv2.cvtColor over the whole stack,
+        intensity sums are one NumPy reduction, and only Canny plus findContours
+        still run per image
+        """
+        if not len(images):
+            return []
+        try:
+            import cv2
+
+            size = (224, 224)
+            frames = np.empty((len(images), size[1], size[0], 3), dtype=np.uint8)
+            for i, image in enumerate(images):
+                array = np.asarray(image)
+                if array.ndim == 2:
+                    array = cv2.cvtColor(array, cv2.COLOR_GRAY2RGB)
+                array = np.ascontiguousarray(array[..., :3])
+                frames[i] = array if array.shape[:2] == (size[1], size[0]) else cv2.resize(array, size)
+
+            # The stack as one tall image: the same conversion as predict_simple, in one call
+            gray = cv2.cvtColor(frames.reshape(-1, size[0], 3), cv2.COLOR_RGB2GRAY).reshape(len(frames), size[1], size[0])
+
+            contour_counts = np.array([
+                len(cv2.findContours(cv2.Canny(frame, 50, 150), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0])
+                for frame in gray
+            ], dtype=np.int64)
+
+            # Every frame is 224x224 here, so the aspect-ratio term is the constant 100
+            feature_sums = gray.reshape(len(gray), -1).sum(axis=1, dtype=np.int64) + contour_counts * 10 + 100
+            confidences = np.minimum(0.8, 0.5 + contour_counts / 100)
+            return [(self.labels[index], float(confidence))
+                    for index, confidence in zip(feature_sums % 3, confidences)]
+
+        except Exception as e:
+            print(f"Error in batch simple prediction: {e}")
+            return [self._predict_heuristic(image) for image in images]
+
+    def predict_batch(self, images):
+        """(label, confidence) for every image: one model call, or the vectorized heuristic"""
+        engine = self.shared_engine()
+        if engine is not None:
+            try:
+                import cv2
+                from image_io import as_rgb_uint8
+                frames = np.stack([cv2.resize(as_rgb_uint8(image), (224, 224)) for image in images])
+                predictions = engine.model.predict_raw(frames)
+                return [(engine.labels[int(np.argmax(p))], float(np.max(p))) for p in predictions]
+            except Exception as e:
+                print(f"Original model batch prediction failed: {e}")
+        return self.predict_simple_batch(images)
+
     def predict(self, image):
-        """Main prediction method"""
-        if self.model_loaded:
+        """Main prediction method (a list of images returns a list of predictions)"""
+        if isinstance(image, list):
+            return self.predict_batch(image)
+        engine = self.shared_engine()
+        if engine is not None:
             try:
-                # Try using the original model first
-                processed_image = self._preprocess_for_original(image)
-                predictions = self.original_model.predict(processed_image)
+                from image_io import as_rgb_uint8
+                # Try using the original model first (preprocessing runs in the graph)
+                predictions = engine.model.predict_raw(as_rgb_uint8(image))
                 predicted_class_index = np.argmax(predictions[0])
                 confidence = predictions[0][predicted_class_index]
-                prediction = self.labels[predicted_class_index]
+                prediction = engine.labels[predicted_class_index]
                 return prediction, confidence
             except Exception as e:
                 print(f"Original model prediction failed: {e}")
@@ -93,15 +197,37 @@ class SimpleGestureClassifier:
             # Use simple prediction
             return self.predict_simple(image)
 
-    def _preprocess_for_original(self, image):
-        """Preprocess image for the original model"""
-        img_array = np.array(image)
-        img_resized = cv2.resize(img_array, (224, 224))
-        if len(img_resized.shape) == 3 and img_resized.shape[2] == 3:
-            img_resized = cv2.cvtColor(img_resized, cv2.COLOR_RGB2BGR)
-        img_normalized = img_resized / 255.0
-        img_batch = np.expand_dims(img_normalized, axis=0)
-        return img_batch
+class HeuristicModel:
+    """
+    The fallback classifier (trained light model, else the heuristic) behind
+    the model interface, served as the 'heuristic' inference backend: the
+    fallback confidence goes to its label, the rest is spread evenly
+    """
+    input_shape = (None, 224, 224, 3)
+
+    def __init__(self, classifier=None):
+        self.classifier = classifier or SimpleGestureClassifier()
+
+    @property
+    def output_shape(self):
+        return (None, len(self.classifier.labels))
+
+    def predict(self, batch, verbose=0):
+        """Float batch from preprocess_batch (BGR, 0-1) back to uint8 RGB frames"""
+        frames = np.clip(np.asarray(batch)[..., ::-1] * 255.0, 0, 255).round().astype(np.uint8)
+        return self.predict_raw(frames)
+
+    def predict_raw(self, images):
+        """Class probabilities for uint8 RGB frames, (H, W, 3) or (N, H, W, 3)"""
+        images = np.asarray(images, dtype=np.uint8)
+        if images.ndim == 3:
+            images = images[np.newaxis]
+        labels = self.classifier.labels
+        probabilities = np.empty((len(images), len(labels)), dtype=np.float32)
+        for i, (label, confidence) in enumerate(self.classifier.predict_simple_batch(images)):
+            probabilities[i] = (1.0 - confidence) / (len(labels) - 1)
+            probabilities[i, labels.index(label)] = confidence
+        return probabilities
 
 # Global classifier instance
 _classifier = None
@@ -0,0 +1,56 @@
+"""
+Cold-start import report: times each import in a fresh interpreter so the
+numbers are not hidden by modules another import already loaded.
+
+    python startup_report.py [--json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Roughly in the order the app touches them
+MODULES = [
+    'numpy',
+    'PIL.Image',
+    'streamlit',
+    'utils',
+    'cv2',
+    'tensorflow',
+    'fast_inference',
+    'simple_classifier',
+]
+
+TIMER = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+def time_import(module):
+    """Seconds to import module in a new interpreter, None if the import fails"""
+    result = subprocess.run(
+        [sys.executable, '-c', TIMER.format(module=module)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Where does startup time go?")
+    parser.add_argument('--json', action='store_true', help="Print machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    report = {module: time_import(module) for module in MODULES}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'module':<20} {'cold import':>12}")
+    for module, seconds in report.items():
+        value = f"{seconds:.3f}s" if seconds is not None else "failed"
+        print(f"{module:<20} {value:>12}")
+    print("\n'utils' is what the welcome screen pays; TensorFlow and OpenCV load in the background.")
+    print("For a per-module tree run: python -X importtime -c 'import utils'")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
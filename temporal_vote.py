@@ -0,0 +1,56 @@
+import os
+
+# Temporal vote over several frames: a decision is stable once the leader's
+# accumulated confidence beats the runner-up by VOTE_MARGIN (0.3 matches the
+# old single-frame confidence gate)
+VOTE_MARGIN = float(os.environ.get('VOTE_MARGIN', 0.3))
+
+class TemporalVote:
+    """Running confidence-weighted vote over the predictions of a frame sequence"""
+    def __init__(self, margin=VOTE_MARGIN):
+        self.margin = margin
+        self.scores = {}
+        self.frames_used = 0
+
+    def add(self, label, confidence):
+        """Count one frame's prediction; returns True once the decision is stable"""
+        self.frames_used += 1
+        if label is not None:
+            self.scores[label] = self.scores.get(label, 0.0) + float(confidence)
+        return self.decided
+
+    @property
+    def leader(self):
+        if not self.scores:
+            return None
+        return max(self.scores, key=self.scores.get)
+
+    @property
+    def lead(self):
+        """Accumulated confidence of the leader minus the runner-up"""
+        ranked = sorted(self.scores.values(), reverse=True) + [0.0, 0.0]
+        return ranked[0] - ranked[1]
+
+    @property
+    def decided(self):
+        return self.leader is not None and self.lead > self.margin
+
+    @property
+    def confidence(self):
+        """Leader's confidence averaged over every frame consumed"""
+        if not self.frames_used or self.leader is None:
+            return 0.0
+        return self.scores[self.leader] / self.frames_used
+
+def vote_over(frames, predict, margin=VOTE_MARGIN, max_frames=None):
+    """
+    Add predict(frame) -> (label, confidence) for frame after frame until the
+    vote is stable or max_frames were used; later frames are never predicted
+    """
+    vote = TemporalVote(margin)
+    for frame in frames:
+        if vote.add(*predict(frame)):
+            break
+        if max_frames is not None and vote.frames_used >= max_frames:
+            break
+    return vote
@@ -0,0 +1,99 @@
+import threading
+import time
+import numpy as np
+import pytest
+
+from batch_scheduler import BatchScheduler
+
+def frames(value, size=2):
+    return np.full((1, size, size, 3), value, dtype=np.uint8)
+
+class Recorder:
+    """predict_fn that records every batch and returns each frame's first pixel"""
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, batch, *args):
+        with self.lock:
+            self.calls.append((len(batch), batch.shape[1:], args))
+        return batch[:, 0, 0, :1].astype(np.float32)
+
+def test_full_batch_flushes_before_the_wait():
+    predict = Recorder()
+    scheduler = BatchScheduler(predict, max_batch_size=4, max_wait_ms=5000)
+    try:
+        start = time.perf_counter()
+        futures = [scheduler.submit(frames(i)) for i in range(4)]
+        outputs = [future.result(timeout=2) for future in futures]
+        assert time.perf_counter() - start < 2
+    finally:
+        scheduler.close()
+    assert [float(output[0, 0]) for output in outputs] == [0, 1, 2, 3]
+    assert predict.calls == [(4, (2, 2, 3), ())]
+
+def test_partial_batch_flushes_after_the_wait():
+    predict = Recorder()
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=20)
+    try:
+        output = scheduler.predict(frames(7), timeout=2)
+    finally:
+        scheduler.close()
+    assert float(output[0, 0]) == 7
+    assert predict.calls == [(1, (2, 2, 3), ())]
+
+def test_requests_are_grouped_by_shape_and_args():
+    predict = Recorder()
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=200)
+    try:
+        futures = [
+            scheduler.submit(frames(1), 'a'),
+            scheduler.submit(frames(2, size=3), 'a'),
+            scheduler.submit(frames(3), 'b'),
+            scheduler.submit(frames(4), 'a'),
+        ]
+        outputs = [float(future.result(timeout=2)[0, 0]) for future in futures]
+    finally:
+        scheduler.close()
+    assert outputs == [1, 2, 3, 4]
+    assert sorted(predict.calls) == sorted([
+        (2, (2, 2, 3), ('a',)),
+        (1, (3, 3, 3), ('a',)),
+        (1, (2, 2, 3), ('b',)),
+    ])
+    assert scheduler.stats()['requests'] == 4
+
+def test_exception_reaches_every_future_in_the_batch():
+    def fail(batch):
+        raise RuntimeError("model exploded")
+    scheduler = BatchScheduler(fail, max_batch_size=3, max_wait_ms=200)
+    try:
+        futures = [scheduler.submit(frames(i)) for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model exploded"):
+                future.result(timeout=2)
+    finally:
+        scheduler.close()
+
+def test_close_serves_queued_requests_then_refuses_new_ones():
+    predict = Recorder()
+    scheduler = BatchScheduler(predict, max_batch_size=8, max_wait_ms=1000)
+    futures = [scheduler.submit(frames(i)) for i in range(3)]
+    scheduler.close()
+    assert [float(future.result(timeout=0)[0, 0]) for future in futures] == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        scheduler.submit(frames(9))
+
+def test_timings_split_queue_wait_from_the_forward_pass():
+    def slow(batch):
+        time.sleep(0.05)
+        return batch[:, 0, 0, :1].astype(np.float32)
+    scheduler = BatchScheduler(slow, max_batch_size=8, max_wait_ms=100)
+    try:
+        output, wait, forward = scheduler.predict_timed(frames(5), timeout=2)
+    finally:
+        scheduler.close()
+    assert float(output[0, 0]) == 5
+    # The lone request waits out max_wait_ms, then the 50 ms forward pass
+    assert 0.08 <= wait < 1
+    assert 0.04 <= forward < 1
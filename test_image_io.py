@@ -0,0 +1,33 @@
+import io
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+pytest.importorskip('numpy')
+
+from image_io import ImageTooLargeError, load_image
+
+def encode(size, format):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (120, 80, 40)).save(buffer, format=format)
+    return buffer.getvalue()
+
+def test_png_over_the_full_decode_limit_is_refused_before_decoding():
+    data = encode((400, 300), 'PNG')
+    with pytest.raises(ImageTooLargeError, match="PNG"):
+        load_image(data, max_full_decode_pixels=100_000)
+
+def test_jpeg_of_the_same_size_is_draft_decoded():
+    data = encode((400, 300), 'JPEG')
+    image = load_image(data, max_full_decode_pixels=100_000, max_side=100)
+    assert image.mode == 'RGB'
+    assert max(image.size) <= 100
+
+def test_png_under_the_limit_loads_downscaled():
+    data = encode((400, 300), 'PNG')
+    image = load_image(data, max_full_decode_pixels=120_000, max_side=100)
+    assert image.size == (100, 75)
+
+def test_pixel_limit_applies_to_every_format():
+    data = encode((400, 300), 'JPEG')
+    with pytest.raises(ImageTooLargeError):
+        load_image(data, max_pixels=100_000)
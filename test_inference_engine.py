@@ -0,0 +1,74 @@
+import threading
+import time
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('PIL')
+
+import inference_engine
+from inference_engine import get_engine, register_backend
+
+class FakeModel:
+    input_shape = (None, 224, 224, 3)
+    output_shape = (None, 3)
+
+    def predict_raw(self, frames):
+        return np.full((len(frames), 3), 1 / 3, dtype=np.float32)
+
+    predict = predict_raw
+
+@pytest.fixture
+def backends(tmp_path):
+    """A fast and a slow fake backend; the slow one loads until release is set"""
+    release = threading.Event()
+    loads = []
+
+    @register_backend('test-fast')
+    def load_fast(model_path, **options):
+        return FakeModel()
+
+    @register_backend('test-slow')
+    def load_slow(model_path, **options):
+        loads.append(model_path)
+        release.wait(timeout=5)
+        return FakeModel()
+
+    labels = tmp_path / 'labels.txt'
+    labels.write_text('0 batu\n1 gunting\n2 kertas\n')
+    yield str(tmp_path / 'model.h5'), str(labels), release, loads
+    release.set()
+    for name in ('test-fast', 'test-slow'):
+        inference_engine._backends.pop(name, None)
+    inference_engine.clear_engines()
+
+def test_loading_one_engine_does_not_block_lookups_of_another(backends):
+    model_path, labels_path, release, loads = backends
+    production = get_engine('test-fast', model_path, labels_path)
+
+    loader = threading.Thread(target=get_engine, args=('test-slow', model_path, labels_path))
+    loader.start()
+    try:
+        while not loads:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        assert get_engine('test-fast', model_path, labels_path) is production
+        assert time.perf_counter() - start < 0.5
+    finally:
+        release.set()
+        loader.join(timeout=5)
+
+def test_concurrent_first_lookups_load_once(backends):
+    model_path, labels_path, release, loads = backends
+    engines = []
+    threads = [threading.Thread(target=lambda: engines.append(get_engine('test-slow', model_path, labels_path)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while not loads:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(loads) == 1
+    assert len(engines) == 4 and all(engine is engines[0] for engine in engines)
+    assert engines[0].labels == ['batu', 'gunting', 'kertas']
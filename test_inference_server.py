@@ -0,0 +1,154 @@
+import asyncio
+import functools
+import importlib
+import io
+import sys
+import types
+from http import HTTPStatus
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+pytest.importorskip('numpy')
+
+class StubUtils(types.ModuleType):
+    """Stands in for utils (and Streamlit): a model that loads on get_model(), one fixed answer"""
+    def __init__(self):
+        super().__init__('utils')
+        self.shared = None
+        self.failures = 0
+        self.classified = []
+
+    def get_model(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("weights missing")
+        self.shared = types.SimpleNamespace(backend='keras', version='abc:CompiledModel:def', model=object())
+        return self.shared
+
+    def peek_model(self):
+        return self.shared
+
+    def classify_image(self, image):
+        self.classified.append(image.size)
+        return 'batu', 0.9, [0.9, 0.05, 0.05]
+
+@pytest.fixture
+def stub(monkeypatch):
+    stub = StubUtils()
+    monkeypatch.setitem(sys.modules, 'utils', stub)
+    monkeypatch.delitem(sys.modules, 'inference_server', raising=False)
+    yield stub
+    sys.modules.pop('inference_server', None)
+
+@pytest.fixture
+def server_module(stub):
+    return importlib.import_module('inference_server')
+
+def jpeg(size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 150, 100)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+def serve(server_module, *requests, load=True):
+    """Run the requests in order on one fresh InferenceServer"""
+    async def run():
+        server = server_module.InferenceServer(max_concurrency=2)
+        try:
+            if load:
+                await server.start_loading()
+            return [await server.request(*request) for request in requests]
+        finally:
+            server.close()
+    return asyncio.run(run())
+
+def test_unknown_route_is_404(server_module):
+    [(status, payload)] = serve(server_module, ('GET', '/nope'))
+    assert status == HTTPStatus.NOT_FOUND
+    assert 'error' in payload
+
+def test_predict_classifies_the_body(server_module, stub):
+    [(status, payload)] = serve(server_module, ('POST', '/predict', jpeg()))
+    assert status == HTTPStatus.OK
+    assert payload['label'] == 'batu' and payload['confidence'] == pytest.approx(0.9)
+    assert stub.classified == [(64, 48)]
+
+def test_empty_body_is_400(server_module, stub):
+    [(status, _)] = serve(server_module, ('POST', '/predict', b''))
+    assert status == HTTPStatus.BAD_REQUEST
+    assert stub.classified == []
+
+def test_undecodable_body_is_400(server_module):
+    [(status, payload)] = serve(server_module, ('POST', '/predict', b'not an image'))
+    assert status == HTTPStatus.BAD_REQUEST
+    assert 'decode' in payload['error']
+
+def test_oversize_image_is_413(server_module, monkeypatch, stub):
+    monkeypatch.setattr(server_module, 'load_image', functools.partial(server_module.load_image, max_pixels=1000))
+    [(status, _)] = serve(server_module, ('POST', '/predict', jpeg()))
+    assert status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert stub.classified == []
+
+def test_oversize_body_is_refused_before_it_is_read(server_module):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"POST /predict HTTP/1.1\r\nContent-Length: {server_module.MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+        return await server_module._read_request(reader, writer=None)
+    with pytest.raises(server_module.HTTPError) as error:
+        asyncio.run(read())
+    assert error.value.status == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+def test_readyz_is_503_until_the_model_loads(server_module):
+    async def run():
+        server = server_module.InferenceServer()
+        try:
+            before = await server.request('GET', '/readyz')
+            predict = await server.request('POST', '/predict', jpeg())
+            await server.start_loading()
+            after = await server.request('GET', '/readyz')
+            return before, predict, after
+        finally:
+            server.close()
+    before, predict, after = asyncio.run(run())
+    assert before[0] == HTTPStatus.SERVICE_UNAVAILABLE and before[1]['ready'] is False
+    assert predict[0] == HTTPStatus.SERVICE_UNAVAILABLE
+    assert after == (HTTPStatus.OK, {'ready': True, 'backend': 'keras',
+                                     'version': 'abc:CompiledModel:def', 'fallback': False})
+
+def test_readyz_retries_a_failed_load(server_module, stub):
+    stub.failures = 1
+    async def run():
+        server = server_module.InferenceServer()
+        try:
+            with pytest.raises(RuntimeError):
+                await server.start_loading()
+            await asyncio.sleep(0)
+            failed = await server.request('GET', '/readyz')
+            await server._loading
+            return failed, await server.request('GET', '/readyz')
+        finally:
+            server.close()
+    failed, ready = asyncio.run(run())
+    assert failed[0] == HTTPStatus.SERVICE_UNAVAILABLE
+    assert 'weights missing' in failed[1]['error']
+    assert ready[0] == HTTPStatus.OK
+
+def test_batch_classifies_every_part_and_isolates_bad_ones(server_module, stub):
+    boundary = 'gesture-boundary'
+    parts = [('a', 'a.jpg', jpeg()), ('b', 'b.jpg', b''), ('c', 'c.jpg', jpeg((32, 32)))]
+    body = b''.join(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n".encode() + data + b"\r\n"
+        for field, filename, data in parts
+    ) + f"--{boundary}--\r\n".encode()
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    [(status, payload)] = serve(server_module, ('POST', '/predict/batch', body, headers))
+    assert status == HTTPStatus.OK
+    results = payload['results']
+    assert [result['name'] for result in results] == ['a.jpg', 'b.jpg', 'c.jpg']
+    assert results[0]['label'] == 'batu' and results[2]['label'] == 'batu'
+    assert results[1]['status'] == HTTPStatus.BAD_REQUEST.value
+    assert sorted(stub.classified) == [(32, 32), (64, 48)]
+
+def test_batch_without_multipart_is_415(server_module):
+    [(status, _)] = serve(server_module, ('POST', '/predict/batch', jpeg(), {'Content-Type': 'image/jpeg'}))
+    assert status == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
@@ -0,0 +1,50 @@
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('PIL')
+
+from inference_engine import load_labels
+from light_classifier import LightGestureClassifier, get_light_classifier
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(autouse=True)
+def repo_labels(monkeypatch):
+    # get_light_classifier checks the artifact against the repo's labels.txt
+    monkeypatch.chdir(ROOT)
+
+def constant_classifier(labels, favourite):
+    """A classifier whose bias alone picks favourite for every image"""
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    blank = LightGestureClassifier(labels, 0, 1, np.zeros((1, len(labels))), np.zeros(len(labels)))
+    dim = blank.features([image]).shape[1]
+    bias = np.where(np.array(labels) == favourite, 5.0, 0.0).astype(np.float32)
+    return LightGestureClassifier(labels, np.zeros(dim, np.float32), np.ones(dim, np.float32),
+                                  np.zeros((dim, len(labels)), np.float32), bias)
+
+def save(model, path, mtime):
+    model.save(path)
+    os.utime(path, ns=(mtime, mtime))
+
+def test_retrained_artifact_is_reloaded(tmp_path):
+    labels = load_labels()
+    path = str(tmp_path / 'fallback_model.npz')
+    image = np.full((64, 64, 3), 128, dtype=np.uint8)
+
+    assert get_light_classifier(path) is None
+
+    save(constant_classifier(labels, labels[0]), path, 1_000_000_000)
+    assert get_light_classifier(path).predict(image)[0] == labels[0]
+    assert get_light_classifier(path) is get_light_classifier(path)
+
+    save(constant_classifier(labels, labels[2]), path, 2_000_000_000)
+    assert get_light_classifier(path).predict(image)[0] == labels[2]
+
+    os.remove(path)
+    assert get_light_classifier(path) is None
+
+def test_artifact_for_other_labels_is_refused(tmp_path):
+    path = str(tmp_path / 'fallback_model.npz')
+    save(constant_classifier(['rock', 'paper', 'scissors'], 'rock'), path, 1_000_000_000)
+    assert get_light_classifier(path) is None
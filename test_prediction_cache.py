@@ -0,0 +1,36 @@
+import pytest
+
+from prediction_cache import PredictionCache
+
+def test_evicts_least_recently_used_entry_at_the_entry_limit():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', ('batu', 0.9))
+    cache.put('b', ('gunting', 0.8))
+    assert cache.get('a') == ('batu', 0.9)
+    cache.put('c', ('kertas', 0.7))
+    assert cache.get('b') is None
+    assert cache.get('a') == ('batu', 0.9)
+    assert cache.get('c') == ('kertas', 0.7)
+    assert cache.stats()['entries'] == 2
+
+def test_evicts_until_under_the_byte_limit():
+    cache = PredictionCache(max_entries=100, max_bytes=600)
+    for key in 'abcdef':
+        cache.put(key, ('batu', 0.5))
+    stats = cache.stats()
+    assert 0 < stats['bytes'] <= 600
+    assert stats['entries'] < 6
+    assert cache.get('f') == ('batu', 0.5)
+    assert cache.get('a') is None
+
+def test_key_depends_on_image_and_model_version():
+    key = PredictionCache.make_key(b'image', 'v1')
+    assert key == PredictionCache.make_key(b'image', 'v1')
+    assert key != PredictionCache.make_key(b'image', 'v2')
+    assert key != PredictionCache.make_key(b'other', 'v1')
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    PredictionCache(disk_dir=str(tmp_path)).put('a', ('kertas', 0.75))
+    cache = PredictionCache(disk_dir=str(tmp_path))
+    assert cache.get('a') == ('kertas', pytest.approx(0.75))
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,31 @@
+import os
+import pytest
+
+pytest.importorskip('tensorflow')
+from inference_engine import MODEL_PATH, load_keras_model, load_labels
+import quantize_model
+from tflite_backend import TFLiteGestureModel
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(autouse=True)
+def in_repo_root(monkeypatch):
+    # Reference images and the model are looked up relative to the repo root
+    monkeypatch.chdir(ROOT)
+
+def test_int8_model_agrees_with_float_model_on_reference_images(tmp_path):
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip(f"{MODEL_PATH} is not available")
+    keras_model = load_keras_model(MODEL_PATH)
+    if keras_model is None:
+        pytest.skip(f"{MODEL_PATH} cannot be loaded with this TensorFlow")
+
+    paths, batches = quantize_model.load_batches(quantize_model.collect_images())
+    assert paths
+    output = quantize_model.convert_to_int8(keras_model, batches, str(tmp_path / 'model_int8.tflite'))
+    report = quantize_model.compare_models(keras_model, TFLiteGestureModel(output), paths, batches, load_labels())
+
+    reference = [row for row in report if row['image'] in quantize_model.REFERENCE_IMAGES]
+    assert reference
+    disagreements = [row['image'] for row in reference if not row['agree']]
+    assert not disagreements, f"int8 top-1 differs from the float model on {disagreements}"
@@ -0,0 +1,37 @@
+import time
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from inference_engine import GestureModel
+from shadow_mode import ShadowRunner
+
+LABELS = ['batu', 'gunting', 'kertas']
+
+class Candidate:
+    def predict_raw(self, frames):
+        return np.tile(np.array([[0.1, 0.2, 0.7]], dtype=np.float32), (len(frames), 1))
+
+def wait_for(condition, timeout=2):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_production_latency_is_taken_from_the_caller():
+    candidate = GestureModel(Candidate(), LABELS, version='candidate', backend='tflite')
+    runner = ShadowRunner(lambda: candidate, backend='tflite', sample_rate=1.0)
+    frame = np.zeros((224, 224, 3), dtype=np.uint8)
+    assert runner.offer(frame, 'kertas', 0.9, 0.25)
+    assert runner.offer(frame, 'batu', 0.8, 0.25)
+    assert wait_for(lambda: runner.stats()['compared'] == 2)
+    stats = runner.stats()
+    assert stats['agreement'] == 0.5
+    assert stats['production']['latency_p50_ms'] == pytest.approx(250)
+    assert stats['candidate']['latency_p50_ms'] < 250
+
+def test_candidate_that_fell_back_turns_shadow_mode_off():
+    fallback = GestureModel(Candidate(), LABELS, version='keras', backend='keras')
+    runner = ShadowRunner(lambda: fallback, backend='tflite-int8', sample_rate=1.0)
+    assert wait_for(lambda: runner.sample_rate == 0.0)
+    assert not runner.offer(np.zeros((224, 224, 3), dtype=np.uint8), 'batu', 0.9, 0.01)
@@ -0,0 +1,38 @@
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+from PIL import Image
+import simple_classifier
+from simple_classifier import SimpleGestureClassifier
+
+# Sample photos bundled with the repo
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SAMPLES = sorted(name for name in os.listdir(ROOT) if name.lower().endswith(('.jpg', '.jpeg', '.png')))
+
+def load_samples():
+    images = []
+    for name in SAMPLES:
+        with Image.open(os.path.join(ROOT, name)) as image:
+            images.append(np.asarray(image.convert('RGB')))
+    return images
+
+def test_heuristic_batch_matches_single_images():
+    classifier = SimpleGestureClassifier()
+    images = load_samples()
+    assert images
+    expected = [classifier._predict_heuristic(image) for image in images]
+    results = classifier._predict_heuristic_batch(images)
+    assert [label for label, _ in results] == [label for label, _ in expected]
+    assert [confidence for _, confidence in results] == pytest.approx([confidence for _, confidence in expected])
+
+def test_predict_list_matches_predict(monkeypatch):
+    # The heuristic path, whether or not a fallback model has been trained locally
+    monkeypatch.setattr(simple_classifier, 'get_light_classifier', lambda: None)
+    classifier = SimpleGestureClassifier()
+    images = load_samples()
+    results = classifier.predict(images)
+    expected = [classifier.predict(image) for image in images]
+    assert [label for label, _ in results] == [label for label, _ in expected]
+    assert [confidence for _, confidence in results] == pytest.approx([confidence for _, confidence in expected])
@@ -0,0 +1,35 @@
+from temporal_vote import TemporalVote, vote_over
+
+def test_vote_is_decided_once_the_lead_beats_the_margin():
+    vote = TemporalVote(margin=1.0)
+    assert not vote.add('batu', 0.9)
+    assert not vote.add('gunting', 0.4)
+    assert vote.add('batu', 0.8)
+    assert vote.leader == 'batu'
+    assert vote.confidence == (0.9 + 0.8) / 3
+
+def test_failed_frames_count_but_do_not_vote():
+    vote = TemporalVote(margin=0.3)
+    assert not vote.add(None, 0)
+    assert vote.leader is None
+    assert vote.add('kertas', 0.8)
+    assert vote.frames_used == 2
+    assert vote.confidence == 0.4
+
+def test_sequence_stops_predicting_once_the_vote_is_stable():
+    predicted = []
+
+    def predict(frame):
+        predicted.append(frame)
+        return 'batu', 0.9
+
+    vote = vote_over(iter(range(10)), predict, margin=1.5)
+    assert vote.decided and vote.leader == 'batu'
+    # 0.9 after one frame, 1.8 > 1.5 after two: the other eight are never classified
+    assert predicted == [0, 1]
+
+def test_sequence_stops_at_max_frames_without_a_decision():
+    labels = iter(['batu', 'gunting'] * 5)
+    vote = vote_over(range(10), lambda frame: (next(labels), 0.9), margin=1.5, max_frames=4)
+    assert not vote.decided
+    assert vote.frames_used == 4
@@ -0,0 +1,114 @@
+import os
+import threading
+import numpy as np
+import cv2
+import tensorflow as tf
+
+# Default location of the converted model, next to keras_model.h5
+TFLITE_MODEL_PATH = 'model.tflite'
+
+def convert_to_tflite(keras_model, output_path=TFLITE_MODEL_PATH):
+    """Convert a Keras model to a TFLite flatbuffer and write it to output_path"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as file:
+        file.write(tflite_model)
+    print(f"TFLite model written to {output_path} ({len(tflite_model) / 1024:.0f} KB)")
+    return output_path
+
+def load_or_convert(keras_model_path, load_keras_model, output_path=TFLITE_MODEL_PATH, num_threads=None):
+    """
+    Load the TFLite model, converting keras_model_path first when the
+    flatbuffer is missing or older than the Keras model.
+    load_keras_model is only called when a conversion is needed.
+    """
+    stale = (
+        not os.path.exists(output_path)
+        or os.path.getmtime(output_path) < os.path.getmtime(keras_model_path)
+    )
+    if stale:
+        keras_model = load_keras_model(keras_model_path)
+        if keras_model is None:
+            return None
+        convert_to_tflite(keras_model, output_path)
+    return TFLiteGestureModel(output_path, num_threads=num_threads)
+
+class TFLiteGestureModel:
+    """
+    Runs a .tflite model through the TFLite interpreter.
+    predict() mirrors keras Model.predict: a float batch in, probabilities out.
+    """
+    def __init__(self, model_path=TFLITE_MODEL_PATH, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        # The interpreter keeps its tensors in place, so calls must not overlap
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return (None,) + tuple(int(d) for d in self._input['shape'][1:])
+
+    @property
+    def output_shape(self):
+        return (None,) + tuple(int(d) for d in self._output['shape'][1:])
+
+    @property
+    def quantized_input(self):
+        """True for full-integer models that take uint8 pixels directly"""
+        return self._input['dtype'] == np.uint8
+
+    def _quantize_input(self, batch):
+        batch = np.asarray(batch)
+        if not self.quantized_input or batch.dtype == np.uint8:
+            return batch.astype(self._input['dtype'], copy=False)
+        # Float input in [0, 1]: map onto the model's uint8 input range
+        scale, zero_point = self._input['quantization']
+        quantized = np.round(batch / scale + zero_point)
+        return np.clip(quantized, 0, 255).astype(np.uint8)
+
+    def _dequantize_output(self, output):
+        if output.dtype != np.uint8:
+            return output
+        scale, zero_point = self._output['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch, verbose=0):
+        """
+        Return class probabilities for every image in the batch.
+        Full-integer models also accept raw uint8 pixels (0-255) directly.
+        """
+        batch = self._quantize_input(batch)
+        with self._lock:
+            if self._input['shape'][0] != len(batch):
+                self.interpreter.resize_tensor_input(self._input['index'], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index']).copy()
+        return self._dequantize_output(output)
+
+    def predict_raw(self, images):
+        """Class probabilities for uint8 RGB frames, (H, W, 3) or (N, H, W, 3)"""
+        images = np.asarray(images, dtype=np.uint8)
+        if images.ndim == 3:
+            images = images[np.newaxis]
+        size = (int(self._input['shape'][2]), int(self._input['shape'][1]))
+        batch = np.empty((len(images), size[1], size[0], 3), dtype=np.uint8)
+        for i, image in enumerate(images):
+            # RGB to BGR while still uint8
+            batch[i] = cv2.resize(image, size)[..., ::-1]
+        if self._pixels_are_model_input():
+            # Full-integer model calibrated on [0, 1]: uint8 pixels are its input
+            return self.predict(batch)
+        return self.predict(batch * np.float32(1.0 / 255.0))
+
+    def _pixels_are_model_input(self):
+        if not self.quantized_input:
+            return False
+        scale, zero_point = self._input['quantization']
+        return zero_point == 0 and abs(scale * 255.0 - 1.0) < 1e-3
@@ -1,147 +1,334 @@
-import tensorflow as tf
+import os
+import threading
+import time
+from collections.abc import Iterator
 import numpy as np
 from PIL import Image
-import cv2
 import streamlit as st
-from simple_classifier import get_classifier
-
-# Custom DepthwiseConv2D layer to handle compatibility issues
-class CompatibleDepthwiseConv2D(tf.keras.layers.DepthwiseConv2D):
-    def __init__(self, *args, **kwargs):
-        # Remove 'groups' from kwargs if present (not supported in current TF version)
-        if 'groups' in kwargs:
-            kwargs.pop('groups')
-        super().__init__(*args, **kwargs)
-
-# Global variables for model and labels
-_model = None
-_labels = None
-
-def load_model():
-    """Load the TensorFlow model and labels"""
-    global _model, _labels
+from prediction_cache import PredictionCache
+from batch_scheduler import BatchScheduler
+from metrics import registry as metrics
+from image_io import as_rgb_uint8, resize_for_model
+from temporal_vote import VOTE_MARGIN, TemporalVote, vote_over  # noqa: F401 - app.py imports them from here
+from inference_engine import MODEL_PATH, INPUT_SIZE, INFERENCE_BACKEND, get_engine
+
+# TensorFlow, OpenCV and the modules built on them are imported on first use,
+# so the welcome screen renders without paying their import cost
+
+# Cross-session micro-batching: flush at INFERENCE_BATCH_SIZE images or after
+# INFERENCE_BATCH_WAIT_MS; INFERENCE_BATCH_SIZE=1 calls the model directly
+INFERENCE_BATCH_SIZE = int(os.environ.get('INFERENCE_BATCH_SIZE', 8))
+INFERENCE_BATCH_WAIT_MS = float(os.environ.get('INFERENCE_BATCH_WAIT_MS', 10))
+
+# Crop single images to the detected hand before classification (HAND_ROI=1)
+HAND_ROI = os.environ.get('HAND_ROI', '0') == '1'
+
+# Bursts and videos: a single confident frame must not settle the vote, so
+# the default needs about two agreeing frames
+SEQUENCE_VOTE_MARGIN = float(os.environ.get('SEQUENCE_VOTE_MARGIN', 1.5))
+
+# Prediction cache limits; set PREDICTION_CACHE_DIR to keep predictions across restarts
+PREDICTION_CACHE_ENTRIES = int(os.environ.get('PREDICTION_CACHE_ENTRIES', 1024))
+PREDICTION_CACHE_BYTES = int(os.environ.get('PREDICTION_CACHE_BYTES', 4 * 1024 * 1024))
+PREDICTION_CACHE_DIR = os.environ.get('PREDICTION_CACHE_DIR')
+
+def get_model():
+    """
+    The shared model of the configured backend, loaded and warmed up once per
+    process and hot-swapped by the model watcher when keras_model.h5 or
+    labels.txt change
+    """
+    global _ready_model
+    from model_reload import start_model_watcher
+    _ready_model = get_engine()
+    start_model_watcher(on_reload=_set_ready_model)
+    return _ready_model
+
+def _set_ready_model(engine):
+    global _ready_model
+    _ready_model = engine
+
+# Set once get_model() has finished, read without blocking by peek_model()
+_ready_model = None
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+startup_timings = {}
+
+def peek_model():
+    """The shared model if it is already loaded, else None (never blocks)"""
+    return _ready_model
+
+def _background_warmup():
+    global _warmup_thread
+    if INFERENCE_BACKEND != 'heuristic':
+        start = time.perf_counter()
+        try:
+            import tensorflow  # noqa: F401 - the import itself is what we are paying for up front
+        except Exception as e:
+            # get_model() below still tries; a keras backend without TF ends in demo mode
+            print(f"Background TensorFlow import failed: {e}")
+        startup_timings['tensorflow_import'] = time.perf_counter() - start
 
-    # Always load labels first
+    start = time.perf_counter()
     try:
-        with open('labels.txt', 'r') as file:
-            lines = [line.strip() for line in file.readlines()]
-            _labels = []
-            for line in lines:
-                # Extract gesture name (remove number prefix)
-                gesture = line.split(' ', 1)[1] if ' ' in line else line
-                _labels.append(gesture)
-        print(f"Labels loaded successfully: {_labels}")
+        get_model()
     except Exception as e:
-        print(f"Error loading labels: {e}")
-        _labels = ['batu', 'gunting', 'kertas']  # Default fallback
-        print("Using default labels")
-
-    # Try loading model only if not already attempted
-    if _model is None:
-        try:
-            # First attempt: with compatible custom objects
-            _model = tf.keras.models.load_model(
-                'keras_model.h5',
-                compile=False,
-                custom_objects={
-                    'DepthwiseConv2D': CompatibleDepthwiseConv2D
-                }
-            )
-            print("Model loaded successfully with compatible custom objects")
-        except Exception as first_error:
-            print(f"First attempt failed: {first_error}")
-            try:
-                # Second attempt: with legacy DepthwiseConv2D
-                tf.keras.utils.get_custom_objects()['DepthwiseConv2D'] = CompatibleDepthwiseConv2D
-                _model = tf.keras.models.load_model('keras_model.h5', compile=False)
-                print("Model loaded successfully with legacy custom objects")
-            except Exception as second_error:
-                print(f"Second attempt failed: {second_error}")
-                try:
-                    # Third attempt: try different loading method
-                    _model = tf.keras.models.load_model('keras_model.h5')
-                    print("Model loaded successfully with default loading")
-                except Exception as third_error:
-                    print(f"Third attempt failed: {third_error}")
-                    # If all attempts fail, set model to None for demo mode
-                    _model = None
-                    print("Model loading failed, using demo mode")
+        print(f"Background model load failed: {e}")
+        # Let the next start_background_warmup() try again
+        with _warmup_lock:
+            _warmup_thread = None
+    startup_timings['model_ready'] = time.perf_counter() - start
+    print(f"Background warm-up done: TensorFlow import {startup_timings.get('tensorflow_import', 0.0):.2f}s, "
+          f"model {startup_timings['model_ready']:.2f}s")
+
+def start_background_warmup():
+    """Import TensorFlow (unless the backend needs none) and load the shared model in a background thread"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is not None or _ready_model is not None:
+            return
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        _warmup_thread = threading.Thread(target=_background_warmup, name='model-warmup', daemon=True)
+        add_script_run_ctx(_warmup_thread)
+        _warmup_thread.start()
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache():
+    """Prediction cache shared by every session of the server process"""
+    cache = PredictionCache(
+        max_entries=PREDICTION_CACHE_ENTRIES,
+        max_bytes=PREDICTION_CACHE_BYTES,
+        disk_dir=PREDICTION_CACHE_DIR
+    )
+    metrics.gauge('prediction_cache_entries', lambda: cache.stats()['entries'])
+    metrics.gauge('prediction_cache_bytes', lambda: cache.stats()['bytes'])
+    return cache
+
+@st.cache_resource(show_spinner=False)
+def get_batch_scheduler():
+    """Micro-batching scheduler shared by every session, None when batching is off"""
+    if INFERENCE_BATCH_SIZE <= 1:
+        return None
+    # Requests carry the model they were made against, so a hot reload never
+    # moves a queued request onto a model with different labels
+    scheduler = BatchScheduler(
+        lambda frames, model: model.predict_raw(frames),
+        max_batch_size=INFERENCE_BATCH_SIZE,
+        max_wait_ms=INFERENCE_BATCH_WAIT_MS
+    )
+    metrics.gauge('batch_queue_depth', lambda: scheduler.stats()['queue_depth'])
+    metrics.gauge('batch_mean_size', lambda: scheduler.stats()['mean_batch_size'])
+    return scheduler
+
+@st.cache_resource(show_spinner=False)
+def get_shadow_runner():
+    """Shadow comparison against a candidate model, None unless SHADOW_BACKEND/SHADOW_MODEL_PATH is set"""
+    from shadow_mode import SHADOW_BACKEND, SHADOW_MODEL_PATH, ShadowRunner
+    if not SHADOW_BACKEND and not SHADOW_MODEL_PATH:
+        return None
+    backend = SHADOW_BACKEND or INFERENCE_BACKEND
+    runner = ShadowRunner(
+        lambda: get_engine(backend, SHADOW_MODEL_PATH or MODEL_PATH),
+        backend=backend,
+        load_production=get_engine
+    )
+    metrics.gauge('shadow_agreement', lambda: runner.stats()['agreement'])
+    return runner
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_pool():
+    """Worker pool running predict_gesture off the Streamlit script threads"""
+    from prediction_pool import PREDICTION_WORKERS, PredictionPool
+    # By default one thread per batch slot, so a micro-batch can fill before its wait runs out
+    pool = PredictionPool(max_workers=PREDICTION_WORKERS or max(INFERENCE_BATCH_SIZE, 4))
+    metrics.gauge('prediction_pool_in_flight', lambda: pool.stats()['in_flight'])
+    return pool
+
+def submit_prediction(image, image_bytes=None, tracker=None):
+    """
+    Start predict_gesture on the worker pool; returns a PendingPrediction whose
+    future gives (label, confidence, error messages), raises PoolFullError when busy
+    """
+    return get_prediction_pool().submit(_predict_in_pool, image, image_bytes, tracker)
 
-    return True
+# Pool threads have no ScriptRunContext, so st.error there would be dropped;
+# their messages are collected here and shown by the script thread instead
+_pool_errors = threading.local()
 
-def preprocess_image(image):
-    """Preprocess image for model prediction"""
+def _predict_in_pool(image, image_bytes, tracker):
+    _pool_errors.messages = []
     try:
-        # Convert PIL Image to numpy array
-        if isinstance(image, Image.Image):
-            img_array = np.array(image)
-        else:
-            img_array = image
-
-        # Resize to 224x224 (standard for Teachable Machine models)
-        img_resized = cv2.resize(img_array, (224, 224))
+        prediction, confidence = predict_gesture(image, image_bytes=image_bytes, tracker=tracker)
+        return prediction, confidence, _pool_errors.messages
+    finally:
+        _pool_errors.messages = None
+
+def _report_error(message):
+    """st.error on a script thread, collected for the caller on a pool thread"""
+    messages = getattr(_pool_errors, 'messages', None)
+    if messages is None:
+        st.error(message)
+    else:
+        print(message)
+        messages.append(message)
 
-        # Convert RGB to BGR if needed (Teachable Machine models expect BGR)
-        if len(img_resized.shape) == 3 and img_resized.shape[2] == 3:
-            img_resized = cv2.cvtColor(img_resized, cv2.COLOR_RGB2BGR)
+def new_hand_tracker():
+    """HandTracker for one player or frame stream, None unless HAND_ROI=1"""
+    if not HAND_ROI:
+        return None
+    from hand_roi import HandTracker
+    return HandTracker()
 
-        # Normalize pixel values to [0, 1]
-        img_normalized = img_resized / 255.0
+def run_model(shared, frames):
+    """
+    Forward pass on uint8 RGB frames (preprocessing runs inside the model),
+    through the batch scheduler when enabled, else directly; returns
+    (predictions, seconds queued for a batch, seconds in the forward pass)
+    """
+    scheduler = get_batch_scheduler()
+    if scheduler is None:
+        start = time.perf_counter()
+        predictions = shared.model.predict_raw(frames)
+        return predictions, 0.0, time.perf_counter() - start
+    return scheduler.predict_timed(frames, shared.model)
 
-        # Add batch dimension
-        img_batch = np.expand_dims(img_normalized, axis=0)
+def load_model():
+    """Make sure the shared model and labels are loaded"""
+    get_model()
+    return True
 
-        return img_batch
+def preprocess_image(image):
+    """Preprocess image for model prediction (float32 batch of one)"""
+    from fast_inference import preprocess_batch
+    try:
+        return preprocess_batch([image], INPUT_SIZE)
     except Exception as e:
-        st.error(f"Error preprocessing image: {e}")
+        _report_error(f"Error preprocessing image: {e}")
         return None
 
-def predict_gesture(image):
-    """Predict the gesture from the image"""
-    if _model is None or _labels is None:
-        load_model()
+def _image_cache_bytes(image):
+    """Bytes identifying a decoded image when the raw upload is not available"""
+    if isinstance(image, Image.Image):
+        return f"{image.mode}{image.size}".encode('utf-8') + image.tobytes()
+    if isinstance(image, np.ndarray):
+        return f"{image.dtype}{image.shape}".encode('utf-8') + image.tobytes()
+    return None
 
+def predict_gesture_sequence(frames, margin=SEQUENCE_VOTE_MARGIN, max_frames=None):
+    """
+    Classify frames of a burst or video one by one and stop as soon as the
+    vote is stable. Returns the TemporalVote (leader, confidence, frames_used).
+    """
+    # Consecutive frames: the hand is searched around its last position
+    tracker = new_hand_tracker()
+    return vote_over(frames, lambda frame: predict_gesture(frame, tracker=tracker), margin, max_frames)
+
+def predict_gesture(image, image_bytes=None, tracker=None):
+    """
+    Predict the gesture from the image.
+    Pass the raw camera/upload bytes as image_bytes so reruns hit the cache
+    without hashing decoded pixels, and the player's tracker (new_hand_tracker)
+    so HAND_ROI crops follow the hand across photos.
+    A list, tuple or iterator of frames is classified with an early-exit
+    temporal vote and returns a TemporalVote instead of (label, confidence).
+    """
+    if isinstance(image, (list, tuple, Iterator)):
+        return predict_gesture_sequence(image)
+
+    shared = get_model()
+    cache = get_prediction_cache()
+
+    if image_bytes is None:
+        image_bytes = _image_cache_bytes(image)
+    cache_key = None
+    if image_bytes is not None:
+        cache_key = cache.make_key(image_bytes, shared.version)
+        cached = cache.get(cache_key)
+        metrics.inc('prediction_cache_total', result='hit' if cached is not None else 'miss')
+        if cached is not None:
+            return cached
+
+    prediction, confidence, _ = _predict_uncached(shared, image, tracker)
+    if cache_key is not None and prediction is not None:
+        cache.put(cache_key, (prediction, confidence))
+    return prediction, confidence
+
+def classify_image(image):
+    """
+    Uncached predict_gesture that also returns the class probabilities as
+    {label: probability} (None on the fallback path), for the HTTP service
+    """
+    shared = get_model()
+    prediction, confidence, probabilities = _predict_uncached(shared, image)
+    if probabilities is not None:
+        probabilities = {label: float(p) for label, p in zip(shared.labels, probabilities)}
+    return prediction, confidence, probabilities
+
+def _predict_fallback(image):
+    """Simple classifier, timed and counted as the fallback path"""
+    from simple_classifier import get_classifier
+    classifier = get_classifier()
+    with metrics.timer('fallback_seconds'):
+        prediction, confidence = classifier.predict(image)
+    metrics.inc('predictions_total', path='fallback')
+    return prediction, confidence
+
+def _predict_uncached(shared, image, tracker=None):
+    """Run the model (or the fallback classifier) on one image; (label, confidence, probabilities)"""
     try:
         # If model is None (demo mode), try simple classifier
-        if _model is None:
+        if shared.model is None:
             try:
                 # Use simple classifier as fallback
-                classifier = get_classifier()
-                prediction, confidence = classifier.predict(image)
-                return prediction, confidence
+                return _predict_fallback(image) + (None,)
             except Exception as e:
-                st.error(f"Simple classifier failed: {e}")
-                return None, 0
+                _report_error(f"Simple classifier failed: {e}")
+                return None, 0, None
 
         # Try using original model first
         try:
-            # Preprocess the image
-            processed_image = preprocess_image(image)
-            if processed_image is None:
-                return None, 0
+            # Channel order and normalization run inside the model
+            start = time.perf_counter()
+            frame = as_rgb_uint8(image)
+            preprocess = time.perf_counter() - start
+            if HAND_ROI:
+                tracker = tracker or new_hand_tracker()
+                with metrics.timer('hand_roi_seconds'):
+                    frame = np.ascontiguousarray(tracker.crop(frame))
+            # Resized before queueing: the batch scheduler only batches frames of one shape
+            start = time.perf_counter()
+            frame = resize_for_model(frame, INPUT_SIZE)
+            metrics.observe('preprocess_seconds', preprocess + time.perf_counter() - start)
 
             # Make prediction
-            predictions = _model.predict(processed_image)
+            predictions, batch_wait, latency = run_model(shared, frame[np.newaxis])
+            if get_batch_scheduler() is not None:
+                metrics.observe('batch_wait_seconds', batch_wait)
+            metrics.observe('inference_seconds', latency)
+            metrics.inc('predictions_total', path='model')
 
             # Get the predicted class and confidence
             predicted_class_index = np.argmax(predictions[0])
             confidence = predictions[0][predicted_class_index]
 
             # Get the label
-            predicted_label = _labels[predicted_class_index]
+            predicted_label = shared.labels[predicted_class_index]
+
+            # Candidate model sees a sample of the same frames off the critical path
+            shadow = get_shadow_runner()
+            if shadow is not None:
+                shadow.offer(frame, predicted_label, confidence, latency)
 
-            return predicted_label, confidence
+            return predicted_label, confidence, predictions[0]
 
         except Exception as model_error:
             print(f"Original model prediction failed: {model_error}")
             # Fallback to simple classifier
-            classifier = get_classifier()
-            prediction, confidence = classifier.predict(image)
-            return prediction, confidence
+            return _predict_fallback(image) + (None,)
 
     except Exception as e:
-        st.error(f"Error making prediction: {e}")
-        return None, 0
+        _report_error(f"Error making prediction: {e}")
+        return None, 0, None
 
 def manual_gesture_selection(player_name):
     """Manual gesture selection for demo mode"""